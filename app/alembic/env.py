@@ -32,10 +32,7 @@ target_metadata = Base.metadata
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
-config.set_main_option(
-    "sqlalchemy.url",
-    f"mysql+aiomysql://{app_config.db.user}:{app_config.db.password}@{app_config.db.hostname}:{app_config.db.port}/{app_config.db.db_name}",
-)
+config.set_main_option("sqlalchemy.url", app_config.db.url.replace("%", "%%"))
 
 
 def run_migrations_offline() -> None:
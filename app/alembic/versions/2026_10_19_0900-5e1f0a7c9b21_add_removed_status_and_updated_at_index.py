@@ -0,0 +1,44 @@
+"""Add removed status and updated_at index
+
+Revision ID: 5e1f0a7c9b21
+Revises: 12c1ba00148d
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e1f0a7c9b21"
+down_revision: Union[str, Sequence[str], None] = "12c1ba00148d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "posts",
+        "status",
+        existing_type=sa.Enum("active", "verified", name="status"),
+        type_=sa.Enum("active", "verified", "removed", name="status"),
+        existing_nullable=False,
+    )
+    op.create_index(op.f("ix_posts_updated_at"), "posts", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_posts_updated_at"), table_name="posts")
+    op.execute("UPDATE posts SET status = 'active' WHERE status = 'removed'")
+    op.alter_column(
+        "posts",
+        "status",
+        existing_type=sa.Enum("active", "verified", "removed", name="status"),
+        type_=sa.Enum("active", "verified", name="status"),
+        existing_nullable=False,
+    )
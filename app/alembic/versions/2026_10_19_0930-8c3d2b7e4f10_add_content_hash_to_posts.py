@@ -0,0 +1,31 @@
+"""Add content_hash to posts
+
+Revision ID: 8c3d2b7e4f10
+Revises: 5e1f0a7c9b21
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c3d2b7e4f10"
+down_revision: Union[str, Sequence[str], None] = "5e1f0a7c9b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("posts", sa.Column("content_hash", sa.CHAR(length=32), nullable=True))
+    op.create_index("ix_posts_source_external_id", "posts", ["source", "external_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_posts_source_external_id", table_name="posts")
+    op.drop_column("posts", "content_hash")
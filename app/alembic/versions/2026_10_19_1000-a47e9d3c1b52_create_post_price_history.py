@@ -0,0 +1,47 @@
+"""Create post_price_history
+
+Revision ID: a47e9d3c1b52
+Revises: 8c3d2b7e4f10
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a47e9d3c1b52"
+down_revision: Union[str, Sequence[str], None] = "8c3d2b7e4f10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "post_price_history",
+        sa.Column("id", sa.BIGINT(), autoincrement=True, nullable=False),
+        sa.Column("post_id", sa.CHAR(length=32), nullable=False),
+        sa.Column("observed_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.Column("price_usd", sa.BIGINT(), nullable=False),
+        sa.Column("original_currency", sa.Enum("usd", "uzs", name="currency"), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["post_id"], ["posts.id"], name=op.f("fk_post_price_history_post_id_posts")
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_post_price_history")),
+    )
+    op.create_index(
+        "ix_post_price_history_post_id_observed_at",
+        "post_price_history",
+        ["post_id", "observed_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_post_price_history_post_id_observed_at", table_name="post_price_history")
+    op.drop_table("post_price_history")
@@ -0,0 +1,29 @@
+"""Add revisit_enqueued_at to posts
+
+Revision ID: 3b8f6d2a9e47
+Revises: a47e9d3c1b52
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b8f6d2a9e47"
+down_revision: Union[str, Sequence[str], None] = "a47e9d3c1b52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("posts", sa.Column("revisit_enqueued_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("posts", "revisit_enqueued_at")
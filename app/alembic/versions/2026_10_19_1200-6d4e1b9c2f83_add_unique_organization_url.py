@@ -0,0 +1,44 @@
+"""Add unique key on organizations (platform, url)
+
+Revision ID: 6d4e1b9c2f83
+Revises: 3b8f6d2a9e47
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6d4e1b9c2f83"
+down_revision: Union[str, Sequence[str], None] = "3b8f6d2a9e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Для каждой пары (platform, url) остаётся организация с наименьшим id
+KEEP = "SELECT platform, url, MIN(id) AS keep_id FROM organizations WHERE url IS NOT NULL GROUP BY platform, url"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Дубликаты, созданные параллельными обработчиками, сливаются до создания ключа
+    op.execute(
+        "UPDATE posts "
+        "JOIN organizations o ON o.id = posts.organization_id "
+        f"JOIN ({KEEP}) k ON k.platform = o.platform AND k.url = o.url "
+        "SET posts.organization_id = k.keep_id "
+        "WHERE posts.organization_id <> k.keep_id"
+    )
+    op.execute(
+        "DELETE o FROM organizations o "
+        f"JOIN ({KEEP}) k ON k.platform = o.platform AND k.url = o.url "
+        "WHERE o.id <> k.keep_id"
+    )
+    op.create_unique_constraint("uq_organizations_platform_url", "organizations", ["platform", "url"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uq_organizations_platform_url", "organizations", type_="unique")
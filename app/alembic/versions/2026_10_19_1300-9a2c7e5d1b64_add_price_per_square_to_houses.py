@@ -0,0 +1,36 @@
+"""Add price_per_square to house details
+
+Revision ID: 9a2c7e5d1b64
+Revises: 6d4e1b9c2f83
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a2c7e5d1b64"
+down_revision: Union[str, Sequence[str], None] = "6d4e1b9c2f83"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("post_sale_houses", "post_rent_houses"):
+        op.add_column(table, sa.Column("price_per_square", sa.Double(), nullable=True))
+        # Для уже сохранённых домов считаем так же, как парсер: цена / площадь, два знака
+        op.execute(
+            f"UPDATE {table} SET price_per_square = ROUND(total_price / total_area_sqm, 2) "
+            "WHERE total_price IS NOT NULL AND total_area_sqm > 0"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("post_rent_houses", "post_sale_houses"):
+        op.drop_column(table, "price_per_square")
@@ -12,6 +12,14 @@ class Proxy:
     login: str
     password: str
     port: int
+    # Файл со снимком состояния прокси (счётчики, блокировки)
+    state_path: str
+    # Интервал сохранения снимка (в секундах)
+    state_save_interval: int
+    # Время блокировки прокси после бана (в секундах)
+    cooldown: int
+    # Количество ошибок подряд, после которого прокси блокируется
+    max_failures: int
 
 
 @dataclass
@@ -22,8 +30,24 @@ class ParserSettings:
     max_retries: int
     # URL полигонального сервиса
     polygon_service_url: str
+    # URL API курсов валют (ответ в формате open.er-api.com)
+    currency_api_url: str
+    # Пауза после успешно обработанного объявления, секунды (случайная в пределах min..max)
+    success_delay_min: int
+    success_delay_max: int
     # Whitelist доменов для парсинга
     allowed_domains: list
+    # Дублирующие (hedged) запросы через второй прокси
+    hedge_enabled: bool
+    # Доля запросов, которые можно дублировать
+    hedge_budget: float
+    # Перцентиль задержки пула, после которого запрос дублируется
+    hedge_percentile: float
+    # Адаптивный таймаут: перцентиль задержки * множитель, ограниченный min/max
+    timeout_percentile: float
+    timeout_multiplier: float
+    timeout_min: float
+    timeout_max: float
 
 
 @dataclass
@@ -33,16 +57,136 @@ class RabbitMQ:
     username: str
     password: str
     vhost: str
+    # Максимальное количество публикаций, ожидающих подтверждения брокера
+    publish_window: int
+    # Количество повторных публикаций неподтверждённого сообщения
+    publish_retries: int
+    # Очереди, которые слушает воркер (по умолчанию все)
+    queues: list
+    # Максимальный приоритет сообщений в очередях (x-max-priority, 0 - без приоритетов)
+    max_priority: int
 
 
 @dataclass
 class DB:
+    # URL подключения SQLAlchemy; по умолчанию собирается из параметров MySQL ниже
+    url: str
     user: str
     password: str
     hostname: str
     port: int
     db_name: str
     db_echo: bool
+    # Сколько записей истории цен копить перед вставкой одним запросом
+    price_history_batch: int
+    # Максимальная задержка записи истории цен, секунды
+    price_history_interval: float
+    # Сколько записей истории цен хранить в памяти, пока БД недоступна
+    price_history_limit: int
+    # Постоянных соединений в пуле; 0 - по WORKER_CONCURRENCY (+1 для записи истории цен)
+    pool_size: int
+    # Дополнительных соединений сверх pool_size при пиковой нагрузке
+    max_overflow: int
+    # Сколько ждать свободного соединения, секунды
+    pool_timeout: float
+    # Пересоздание соединения старше указанного возраста, секунды (меньше wait_timeout MySQL)
+    pool_recycle: int
+    # Проверять соединение запросом перед выдачей из пула. Если выключено, обрыв обнаруживается
+    # по ошибке запроса: пул сбрасывает соединения, а объявление обрабатывается повторно
+    pool_pre_ping: bool
+
+
+@dataclass
+class Worker:
+    # Количество одновременно обрабатываемых сообщений
+    concurrency: int
+    # Доля слотов, зарезервированная для сообщений с высоким приоритетом
+    reserved_share: float
+    # Приоритет, начиная с которого сообщение считается высокоприоритетным
+    high_priority: int
+
+
+@dataclass
+class Archive:
+    # Сохранять ли сырые HTML страницы в архив
+    enabled: bool
+    # Каталог с сегментами архива и индексом
+    dir: str
+    # Алгоритм сжатия: gzip или zstd (требует пакет zstandard)
+    codec: str
+    # Максимальный размер одного сегмента (в байтах)
+    segment_size: int
+
+
+@dataclass
+class Crawler:
+    # Категории для обхода (по умолчанию все из app.crawler.CATEGORIES)
+    categories: list
+    # Максимальное количество страниц выдачи в категории
+    max_pages: int
+    # Количество одновременно загружаемых страниц выдачи
+    concurrency: int
+    # Файл с последними увиденными ID объявлений по категориям
+    watermark_path: str
+    # Сколько последних ID хранить на категорию
+    watermark_size: int
+
+
+@dataclass
+class Revisit:
+    # Минимальный возраст последней проверки поста, секунды
+    min_age: int
+    # Посты старше fresh_days проверяются в stale_factor раз реже
+    fresh_days: int
+    stale_factor: int
+    # Максимум сообщений в секунду
+    rate: float
+    # Сколько постов выбирать из БД за один запрос
+    batch: int
+    # Пауза между проходами, секунды
+    interval: int
+    # Сколько секунд опубликованный пост не публикуется повторно, пока воркер его не обработал
+    enqueued_ttl: int
+
+
+@dataclass
+class Profiling:
+    # Каталог для медленных страниц (пусто - не сохранять)
+    slow_page_dir: str
+    # Порог времени парсинга страницы, секунды
+    slow_page_threshold: float
+    # Доля медленных страниц, которые сохраняются
+    slow_page_sample_rate: float
+    # Максимум сохранённых страниц в каталоге
+    slow_page_max_files: int
+    # Каталог для профилей (SIGUSR2 или /debug/profile на порту метрик)
+    profile_dir: str
+    # Длительность профилирования по сигналу, секунды
+    profile_seconds: float
+
+
+@dataclass
+class Metrics:
+    # HTTP эндпоинт /metrics в процессе воркера
+    enabled: bool
+    host: str
+    port: int
+
+
+@dataclass
+class Spool:
+    # Писать результаты парсинга в локальный спул и подтверждать сообщение сразу после записи
+    enabled: bool
+    # Каталог с сегментами спула и позицией выгрузки
+    dir: str
+    # Максимальный размер одного сегмента (в байтах)
+    segment_size: int
+    # Сколько записей выгружать в БД одной транзакцией
+    batch: int
+    # Пауза между проверками спула, когда он пуст, секунды
+    interval: float
+    # Максимальная пауза между повторами при недоступности БД, секунды
+    retry_max: float
 
 
 @dataclass
@@ -51,29 +195,68 @@ class Config:
     proxy: Proxy
     parser: ParserSettings
     rabbitmq: RabbitMQ
+    worker: Worker
+    archive: Archive
+    crawler: Crawler
+    revisit: Revisit
+    metrics: Metrics
+    profiling: Profiling
+    spool: Spool
+
+
+def load_db() -> DB:
+    url = env.str("DB_URL", "")
+    # Параметры MySQL обязательны, только если DB_URL не задан
+    db = DB(
+        url=url,
+        user=env.str("DB_USER", "") if url else env.str("DB_USER"),
+        password=env.str("DB_PASSWORD", "") if url else env.str("DB_PASSWORD"),
+        hostname=env.str("DB_HOST", "localhost"),
+        port=env.int("DB_PORT", 3306),
+        db_name=env.str("DB_NAME", "") if url else env.str("DB_NAME"),
+        db_echo=env.bool("DB_ECHO", False),
+        price_history_batch=env.int("PRICE_HISTORY_BATCH", 200),
+        price_history_interval=env.float("PRICE_HISTORY_INTERVAL", 5.0),
+        price_history_limit=env.int("PRICE_HISTORY_LIMIT", 50_000),
+        pool_size=env.int("DB_POOL_SIZE", 0),
+        max_overflow=env.int("DB_MAX_OVERFLOW", 10),
+        pool_timeout=env.float("DB_POOL_TIMEOUT", 30.0),
+        pool_recycle=env.int("DB_POOL_RECYCLE", 1800),
+        pool_pre_ping=env.bool("DB_POOL_PRE_PING", True),
+    )
+    if not url:
+        db.url = f"mysql+aiomysql://{db.user}:{db.password}@{db.hostname}:{db.port}/{db.db_name}"
+    return db
 
 
 def load_config() -> Config:
     return Config(
-        db=DB(
-            user=env.str("DB_USER"),
-            password=env.str("DB_PASSWORD"),
-            hostname=env.str("DB_HOST", "localhost"),
-            port=env.int("DB_PORT", 3306),
-            db_name=env.str("DB_NAME"),
-            db_echo=env.bool("DB_ECHO", False),
-        ),
+        db=load_db(),
         proxy=Proxy(
             ips=env.list("PROXIES_IP"),
             login=env.str("PROXY_LOGIN"),
             password=env.str("PROXY_PASSWORD"),
             port=env.int("PROXY_PORT"),
+            state_path=env.str("PROXY_STATE_PATH", "proxy_state.json"),
+            state_save_interval=env.int("PROXY_STATE_SAVE_INTERVAL", 30),
+            cooldown=env.int("PROXY_COOLDOWN", 600),
+            max_failures=env.int("PROXY_MAX_FAILURES", 3),
         ),
         parser=ParserSettings(
             request_timeout=env.int("REQUEST_TIMEOUT", 10),
             max_retries=env.int("MAX_RETRIES", 3),
             polygon_service_url=env.str("POLYGON_SERVICE_URL", "http://194.87.56.245/search"),
+            currency_api_url=env.str("CURRENCY_API_URL", "https://open.er-api.com/v6/latest/USD"),
+            success_delay_min=env.int("SUCCESS_DELAY_MIN", 1),
+            success_delay_max=env.int("SUCCESS_DELAY_MAX", 2),
             allowed_domains=env.list("ALLOWED_DOMAINS", ["olx.uz", "www.olx.uz"]),
+            hedge_enabled=env.bool("HEDGE_ENABLED", False),
+            hedge_budget=env.float("HEDGE_BUDGET", 0.1),
+            hedge_percentile=env.float("HEDGE_PERCENTILE", 0.9),
+            timeout_percentile=env.float("TIMEOUT_PERCENTILE", 0.99),
+            timeout_multiplier=env.float("TIMEOUT_MULTIPLIER", 1.5),
+            timeout_min=env.float("TIMEOUT_MIN", 1.0),
+            timeout_max=env.float("TIMEOUT_MAX", env.int("REQUEST_TIMEOUT", 10)),
         ),
         rabbitmq=RabbitMQ(
             host=env.str("RABBITMQ_HOST"),
@@ -81,5 +264,57 @@ def load_config() -> Config:
             username=env.str("RABBITMQ_USERNAME"),
             password=env.str("RABBITMQ_PASSWORD"),
             vhost=env.str("RABBITMQ_VHOST", "/"),
+            publish_window=env.int("RABBITMQ_PUBLISH_WINDOW", 256),
+            publish_retries=env.int("RABBITMQ_PUBLISH_RETRIES", 3),
+            queues=env.list("WORKER_QUEUES", []),
+            max_priority=env.int("RABBITMQ_MAX_PRIORITY", 10),
+        ),
+        worker=Worker(
+            concurrency=env.int("WORKER_CONCURRENCY", 1),
+            reserved_share=env.float("WORKER_RESERVED_SHARE", 0.25),
+            high_priority=env.int("WORKER_HIGH_PRIORITY", 5),
+        ),
+        archive=Archive(
+            enabled=env.bool("ARCHIVE_ENABLED", False),
+            dir=env.str("ARCHIVE_DIR", "archive"),
+            codec=env.str("ARCHIVE_CODEC", "gzip"),
+            segment_size=env.int("ARCHIVE_SEGMENT_SIZE", 256 * 1024 * 1024),
+        ),
+        crawler=Crawler(
+            categories=env.list("CRAWL_CATEGORIES", []),
+            max_pages=env.int("CRAWL_MAX_PAGES", 25),
+            concurrency=env.int("CRAWL_CONCURRENCY", 5),
+            watermark_path=env.str("CRAWL_WATERMARK_PATH", "crawl_watermark.json"),
+            watermark_size=env.int("CRAWL_WATERMARK_SIZE", 5000),
+        ),
+        revisit=Revisit(
+            min_age=env.int("REVISIT_MIN_AGE", 24 * 60 * 60),
+            fresh_days=env.int("REVISIT_FRESH_DAYS", 7),
+            stale_factor=env.int("REVISIT_STALE_FACTOR", 3),
+            rate=env.float("REVISIT_RATE", 5.0),
+            batch=env.int("REVISIT_BATCH", 500),
+            interval=env.int("REVISIT_INTERVAL", 15 * 60),
+            enqueued_ttl=env.int("REVISIT_ENQUEUED_TTL", 24 * 60 * 60),
+        ),
+        metrics=Metrics(
+            enabled=env.bool("METRICS_ENABLED", True),
+            host=env.str("METRICS_HOST", "127.0.0.1"),
+            port=env.int("METRICS_PORT", 9100),
+        ),
+        profiling=Profiling(
+            slow_page_dir=env.str("SLOW_PAGE_DIR", ""),
+            slow_page_threshold=env.float("SLOW_PAGE_THRESHOLD", 2.0),
+            slow_page_sample_rate=env.float("SLOW_PAGE_SAMPLE_RATE", 1.0),
+            slow_page_max_files=env.int("SLOW_PAGE_MAX_FILES", 500),
+            profile_dir=env.str("PROFILE_DIR", "profiles"),
+            profile_seconds=env.float("PROFILE_SECONDS", 30.0),
+        ),
+        spool=Spool(
+            enabled=env.bool("SPOOL_ENABLED", False),
+            dir=env.str("SPOOL_DIR", "spool"),
+            segment_size=env.int("SPOOL_SEGMENT_SIZE", 64 * 1024 * 1024),
+            batch=env.int("SPOOL_BATCH", 100),
+            interval=env.float("SPOOL_INTERVAL", 1.0),
+            retry_max=env.float("SPOOL_RETRY_MAX", 60.0),
         ),
     )
@@ -0,0 +1,189 @@
+"""
+Обход выдачи OLX по категориям недвижимости и публикация ссылок в очереди по типам.
+
+Запуск:
+    python -m app.crawler
+"""
+
+import asyncio
+
+import aio_pika
+from bs4 import BeautifulSoup
+from loguru import logger
+
+from .core.config import load_config
+from .misc.fetch import fetch_hedged, get_headers
+from .misc.page_check import PageKind, classify_page
+from .misc.proxy import Proxy
+from .misc.publisher import Publisher
+from .misc.topology import PRIORITY_FRESH, PRIORITY_NEW, declare_topology, routing_key
+from .misc.url import ad_id_from_url, canonicalize_url
+from .misc.watermark import Watermark
+from .models.post import TypeOfProperty, TypeOfService
+from .schemas.message import PostMessage
+
+config = load_config()
+
+_proxy = Proxy()
+_watermark = Watermark(config.crawler.watermark_path, config.crawler.watermark_size)
+
+LISTING_URL = "https://www.olx.uz/nedvizhimost/{category}/?page={page}"
+
+# Категория выдачи -> (тип недвижимости, вид услуги)
+CATEGORIES = {
+    "kvartiry/prodazha": (TypeOfProperty.APARTMENT, TypeOfService.SALE),
+    "kvartiry/arenda-dolgosrochnaya": (TypeOfProperty.APARTMENT, TypeOfService.RENT),
+    "doma/prodazha": (TypeOfProperty.HOUSE, TypeOfService.SALE),
+    "doma/arenda-dolgosrochnaya": (TypeOfProperty.HOUSE, TypeOfService.RENT),
+    "kommercheskie-pomeshcheniya/prodazha": (TypeOfProperty.COMMERCE, TypeOfService.SALE),
+    "kommercheskie-pomeshcheniya/arenda": (TypeOfProperty.COMMERCE, TypeOfService.RENT),
+}
+
+
+def extract_links(html: str) -> list[tuple[str, bool]]:
+    """
+    Находит ссылки на объявления внутри блоков с data-cy="ad-card-title".
+    Возвращает пары (ссылка, опубликовано ли объявление сегодня)
+    """
+    soup = BeautifulSoup(html, "lxml")
+    try:
+        links = []
+        for a in soup.select('div[data-cy="ad-card-title"] a'):
+            href = a.get("href")
+            if href and href.startswith("/d/obyavlenie/"):
+                card = a.find_parent(attrs={"data-cy": "l-card"})
+                date = card.find(attrs={"data-testid": "location-date"}) if card else None
+                is_fresh = date is not None and "Сегодня" in date.get_text()
+                links.append((canonicalize_url("https://www.olx.uz" + href), is_fresh))
+        return links
+    finally:
+        soup.decompose()
+
+
+def is_listing_response(status_code: int, response_text: str) -> bool:
+    """Окончательный ответ для страницы выдачи: разметки объявления на ней нет, отсекается только challenge"""
+    if status_code == 200:
+        return classify_page(response_text) != PageKind.CHALLENGE
+    return status_code in (404, 410)
+
+
+async def fetch_links(url: str) -> list[tuple[str, bool]]:
+    """Загружает страницу выдачи через пул прокси"""
+    headers = get_headers()
+    max_retries = min(config.parser.max_retries, len(_proxy.proxies))
+
+    for attempt in range(max_retries):
+        try:
+            proxy_ip = _proxy.get()
+        except RuntimeError:
+            logger.error("Все прокси заблокированы или недоступны")
+            break
+
+        try:
+            status_code, response_text, proxy_ip = await fetch_hedged(
+                url, proxy_ip, headers, _proxy, is_listing_response
+            )
+        except Exception as e:
+            logger.warning(f"Ошибка при загрузке {url} через {proxy_ip}: {type(e).__name__}: {e}")
+            _proxy.report_failure(proxy_ip)
+            continue
+
+        if status_code == 200 and classify_page(response_text) != PageKind.CHALLENGE:
+            _proxy.report_success(proxy_ip)
+            return extract_links(response_text)
+        if status_code == 404:
+            return []
+        if status_code in (200, 403):
+            # 200 здесь означает challenge-страницу - прокси забанен так же, как при 403
+            _proxy.block(proxy_ip)
+        else:
+            _proxy.report_failure(proxy_ip)
+        logger.warning(f"Статус {status_code} для {url} от {proxy_ip} (попытка {attempt + 1}/{max_retries})")
+
+    logger.error(f"Не удалось загрузить страницу выдачи: {url}")
+    return []
+
+
+async def crawl(publisher: Publisher) -> dict[str, list[str]]:
+    """
+    Обходит выдачу всех категорий параллельно, страницы каждой категории - по порядку.
+    Обход категории останавливается на первой странице, где все объявления уже есть
+    в watermark. Возвращает новые ID объявлений по категориям.
+    """
+    categories = config.crawler.categories or list(CATEGORIES)
+    semaphore = asyncio.Semaphore(config.crawler.concurrency)
+    seen: set[str] = set()
+
+    async def crawl_category(category: str) -> list[str]:
+        type_of_property, type_of_service = CATEGORIES.get(category, (None, None))
+        new_ids = []
+        for page in range(1, config.crawler.max_pages + 1):
+            async with semaphore:
+                page_links = await fetch_links(LISTING_URL.format(category=category, page=page))
+            if not page_links:
+                break
+
+            page_ads = [(ad_id_from_url(link) or link, link, is_fresh) for link, is_fresh in page_links]
+            if all(_watermark.is_known(category, ad_id) for ad_id, _, _ in page_ads):
+                logger.info(f"{category}: страница {page} не содержит новых объявлений, останавливаемся")
+                break
+
+            for ad_id, link, is_fresh in page_ads:
+                if ad_id in seen or _watermark.is_known(category, ad_id):
+                    continue
+                seen.add(ad_id)
+                new_ids.append(ad_id)
+                envelope = PostMessage(
+                    url=link,
+                    id=ad_id,
+                    source="crawler",
+                    type_of_property=type_of_property,
+                    type_of_service=type_of_service,
+                    priority=PRIORITY_FRESH if is_fresh else PRIORITY_NEW,
+                )
+                await publisher.publish(
+                    envelope.to_amqp(), routing_key=routing_key(type_of_property, type_of_service)
+                )
+        return new_ids
+
+    results = await asyncio.gather(*(crawl_category(category) for category in categories))
+    return dict(zip(categories, results))
+
+
+async def main():
+    _proxy.load()
+    _watermark.load()
+
+    rabbitmq_url = (
+        f"amqp://{config.rabbitmq.username}:{config.rabbitmq.password}@"
+        f"{config.rabbitmq.host}:{config.rabbitmq.port}/{config.rabbitmq.vhost}"
+    )
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    try:
+        channel = await connection.channel(publisher_confirms=True)
+        exchange = await declare_topology(channel)
+
+        publisher = Publisher(exchange, config.rabbitmq.publish_window, config.rabbitmq.publish_retries)
+        try:
+            new_ids = await crawl(publisher)
+        finally:
+            failed = await publisher.flush()
+
+        found = sum(map(len, new_ids.values()))
+        if failed:
+            # Watermark не обновляем, чтобы неопубликованные объявления нашлись при следующем обходе
+            logger.error(f"Найдено {found} новых объявлений, не подтверждено брокером {failed}")
+            return
+
+        # Запоминаем ID только после подтверждения публикации всех ссылок
+        for category, ad_ids in new_ids.items():
+            _watermark.add(category, ad_ids)
+        _watermark.save()
+
+        logger.info(f"Найдено и опубликовано {found} новых объявлений")
+    finally:
+        await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
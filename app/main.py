@@ -1,19 +1,32 @@
 import asyncio
 import gc
+import time
 from random import randint
-from urllib.parse import urlparse
 import aio_pika
 
 import aiohttp
 from bs4 import BeautifulSoup
 from loguru import logger
-from pydantic import BaseModel, field_validator
 
 from .core.config import load_config
 from .exception import ParserError
+from .misc.archive import archive
+from .misc.fetch import fetch_hedged, get_headers
+from .misc.page_check import PageKind, classify_page
 from .misc.proxy import Proxy
-from fake_useragent import UserAgent
-import cloudscraper
+from .misc.publisher import Publisher
+from .misc.scheduler import PriorityGate
+from .misc.slow_pages import slow_pages
+from .misc.topology import ALL_QUEUES, declare_topology, routing_key
+from .misc.inflight import InFlight
+from .misc import metrics, profiler
+from .misc.url import URLValidator, ad_id_from_url
+from .models.post import Status
+from .persistence.posts import mark_removed
+from .persistence.price_history import price_history
+from .persistence.spool import spool
+from .persistence.store import store
+from .schemas.message import PostMessage
 
 from .parse.parse_post import BaseParser
 
@@ -24,167 +37,304 @@ from . import parse  # noqa: F401
 config = load_config()
 
 _proxy = Proxy()
+_in_flight = InFlight()
+_gate = PriorityGate(
+    config.worker.concurrency, round(config.worker.concurrency * config.worker.reserved_share)
+)
 
-ua = UserAgent()
+# Создаётся в main() на отдельном канале с publisher confirms
+_publisher: Publisher | None = None
 
 
-class URLValidator(BaseModel):
-    url: str
+def decode_message(message: aio_pika.IncomingMessage) -> PostMessage:
+    timestamp = message.timestamp.timestamp() if message.timestamp else None
+    return PostMessage.decode(message.body, timestamp)
 
-    @field_validator("url")
-    @classmethod
-    def validate_url(cls, v: str) -> str:
-        parsed = urlparse(v)
-        if not parsed.scheme or not parsed.netloc:
-            raise ValueError("Невалидный URL")
 
-        # Проверяем, что домен в whitelist
-        domain = parsed.netloc.lower()
-        if domain not in config.parser.allowed_domains:
-            raise ValueError(f"Домен {domain} не разрешен для парсинга")
-
-        return v
+async def requeue(message: aio_pika.IncomingMessage):
+    """
+    Возвращает сообщение в конец очереди: публикует копию с увеличенным attempt,
+    дожидается подтверждения брокера и только после этого подтверждает исходное сообщение
+    """
+    try:
+        envelope = decode_message(message)
+        envelope.attempt += 1
+        await _publisher.send(
+            envelope.to_amqp(), routing_key=routing_key(envelope.type_of_property, envelope.type_of_service)
+        )
+        await message.ack()
+        metrics.requeues.inc()
+    except Exception as e:
+        logger.error(f"Не удалось переопубликовать сообщение, возвращаем через nack: {e}")
+        await message.nack(requeue=True)
 
 
-def get_headers() -> dict:
-    """Генерирует заголовки с случайным User-Agent"""
-    return {
-        "User-Agent": ua.random,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Referer": "https://www.olx.uz/",
-        "Connection": "keep-alive",
-    }
+async def handle_removed(envelope: PostMessage):
+    """Помечает пост снятым, если сообщение было перепроверкой сохранённого поста"""
+    if envelope.post_id is None:
+        return
+    try:
+        if config.spool.enabled:
+            await spool.set_status(envelope.post_id, Status.REMOVED)
+        else:
+            await mark_removed(envelope.post_id)
+    except Exception as e:
+        logger.error(f"Не удалось пометить пост {envelope.post_id} снятым: {e}")
 
 
-async def fetch_with_cloudscraper(url: str, proxy_ip: str, headers: dict, timeout: int) -> tuple[int, str]:
+async def parse_and_store(
+    message: aio_pika.IncomingMessage, url: str, response_text: str, session: aiohttp.ClientSession
+):
     """
-    Выполняет синхронный запрос через cloudscraper в отдельном потоке
-    Возвращает (status_code, response_text)
+    Разбирает загруженную страницу и сохраняет пост. Ошибки разбора и записи не связаны
+    с прокси: сообщение возвращается в очередь, статистика прокси не меняется
     """
+    soup = None
+    post = None
 
-    def _fetch():
-        scraper = None
+    if config.archive.enabled:
+        # Архивируем до парсинга, чтобы страницы с ParserError тоже можно было перепарсить
         try:
-            if config.proxy.login and config.proxy.password:
-                proxy_with_auth = f"http://{config.proxy.login}:{config.proxy.password}@{proxy_ip}:{config.proxy.port}"
-            else:
-                proxy_with_auth = f"http://{proxy_ip}:{config.proxy.port}"
-
-            proxies = {"http": proxy_with_auth, "https": proxy_with_auth}
+            await asyncio.to_thread(archive.append, ad_id_from_url(url) or url, url, response_text)
+        except Exception as e:
+            logger.error(f"Не удалось сохранить страницу в архив: {e}")
 
-            scraper = cloudscraper.create_scraper(browser={"browser": "chrome", "platform": "windows", "mobile": False})
-            scraper.proxies = proxies
-
-            response = scraper.get(url, headers=headers, timeout=timeout)
-            return response.status_code, response.text
-        finally:
-            # Явно закрываем scraper для освобождения ресурсов
-            if scraper is not None:
-                try:
-                    scraper.close()
-                except Exception:
-                    pass
+    try:
+        started = time.perf_counter()
+        soup = BeautifulSoup(response_text, "lxml")
+        soup_seconds = time.perf_counter() - started
+        post = await BaseParser(url, soup, session).execute()
+        # Ожидание полигона, курса валют и БД внутри парсера учитывается своими этапами, а не разбором:
+        # иначе медленные страницы выбирались бы по задержке сети
+        parse_seconds = time.perf_counter() - started - sum(post.waits.values())
+        # Запись готова, DOM больше не нужен: освобождаем его до записи в БД
+        soup.decompose()
+        soup = None
+        post.timings["build_soup"] = soup_seconds
+        metrics.extractor_seconds.observe(soup_seconds, parser="BeautifulSoup", stage="build_soup")
+        metrics.stage_seconds.observe(parse_seconds, stage="parse")
+        for stage, seconds in post.waits.items():
+            metrics.stage_seconds.observe(seconds, stage=stage)
+        if slow_pages.should_capture(parse_seconds):
+            try:
+                await asyncio.to_thread(
+                    slow_pages.capture,
+                    ad_id_from_url(url) or "page",
+                    url,
+                    response_text,
+                    parse_seconds,
+                    post.timings,
+                )
+            except Exception as e:
+                logger.error(f"Не удалось сохранить медленную страницу: {e}")
+        with metrics.stage_seconds.time(stage="db"):
+            await store(post)
+    except ParserError as e:
+        logger.error(f"Ошибка парсера: {e}")
+        metrics.messages.inc(result="parser_error")
+        await requeue(message)
+        return
+    except Exception as e:
+        stage = "разбора" if post is None else "записи"
+        logger.error(f"Ошибка {stage} {url}: {type(e).__name__}: {e}")
+        metrics.messages.inc(result="parser_error" if post is None else "store_error")
+        await requeue(message)
+        return
+    finally:
+        # Явно очищаем объекты для освобождения памяти
+        if soup is not None:
+            soup.decompose()
+        del soup, post
 
-    # Выполняем синхронный код в отдельном потоке, чтобы не блокировать event loop
-    return await asyncio.to_thread(_fetch)
+    logger.success(f"Парсинг завершен успешно для {url}")
+    await message.ack()
+    metrics.messages.inc(result="parsed")
+    await asyncio.sleep(randint(config.parser.success_delay_min, config.parser.success_delay_max))
 
 
 async def process_message(message: aio_pika.IncomingMessage, session: aiohttp.ClientSession):
-    """Обрабатывает одно сообщение из очереди"""
-    url = message.body.decode()
-    soup = None
-    post = None
-
+    """
+    Обрабатывает одно сообщение из очереди: загружает страницу, перебирая прокси,
+    затем разбирает и сохраняет её. Прокси штрафуются только за ошибки загрузки
+    """
     try:
-        URLValidator(url=url)
+        envelope = decode_message(message)
+        url = URLValidator(url=envelope.url).url
     except ValueError as e:
-        logger.error(f"Невалидный URL: {url}, ошибка: {e}")
-        await message.ack()  # Удаляем невалидные URL из очереди
+        logger.error(f"Невалидное сообщение: {message.body[:200]!r}, ошибка: {e}")
+        await message.ack()  # Удаляем невалидные сообщения из очереди
+        metrics.messages.inc(result="invalid")
         return
 
+    queue_wait = envelope.queue_wait()
+    if queue_wait is not None:
+        metrics.queue_lag.observe(queue_wait)
+    logger.debug(
+        f"Сообщение {envelope.id or url}: источник {envelope.source}, попытка {envelope.attempt + 1}, "
+        f"ожидание в очереди {queue_wait if queue_wait is None else round(queue_wait, 1)}с"
+    )
+
     max_retries = min(config.parser.max_retries, len(_proxy.proxies))
     headers = get_headers()
 
-    proxy_ip = _proxy.get()
+    # Прокси берётся внутри попытки: если все на cooldown, RuntimeError обрабатывается ожиданием ниже
+    proxy_ip = None
+    page = None
+
+    # Дубликат объявления, которое уже обрабатывается, не загружаем повторно
+    in_flight_key = ad_id_from_url(url) or url
+    if not _in_flight.claim(in_flight_key):
+        logger.info(f"Объявление {in_flight_key} уже обрабатывается, пропускаем дубликат")
+        await message.ack()
+        metrics.messages.inc(result="duplicate")
+        return
 
     try:
         for attempt in range(max_retries):
-            logger.info(f"Используется прокси {proxy_ip} (попытка {attempt + 1}/{max_retries})")
+            if attempt:
+                metrics.retries.inc(reason=retry_reason)
+            retry_reason = None
 
             try:
-                status_code, response_text = await fetch_with_cloudscraper(
-                    url, proxy_ip, headers, config.parser.request_timeout
-                )
-
-                logger.debug(f"Получен статус код: {status_code}")
-
-                if status_code == 200:
-                    logger.info(f"Успешно получена страница: {url}")
-                    soup = BeautifulSoup(response_text, "lxml")
-                    post = await BaseParser(url, soup, session).execute()
-                    await post.send_db()
-
-                    logger.success(f"Парсинг завершен успешно для {url}")
-                    await message.ack()
-                    await asyncio.sleep(randint(1, 2))
-                    return
-                elif status_code == 403:
-                    logger.warning(f"Прокси {proxy_ip} заблокирован (403), пробуем следующий...")
-                    proxy_ip = _proxy.get()
-                    continue
-                elif status_code == 404:
-                    logger.error(f"Страница не найдена: {url}")
-                    await message.ack()  # Удаляем из очереди, т.к. страница не существует
-                    return
-                elif status_code == 410:
-                    logger.info(f"Страница {url} удалена")
-                    await message.ack()  # Удаляем из очереди, т.к. страница не существует
-                    return
-                else:
-                    logger.warning(f"Получен статус {status_code} от {proxy_ip}, пробуем следующий...")
+                if proxy_ip is None:
                     proxy_ip = _proxy.get()
-                    continue
-
-            except ParserError as e:
-                logger.error(f"Ошибка парсера: {e}")
-                await message.nack(requeue=True)
-                return
+                logger.info(f"Используется прокси {proxy_ip} (попытка {attempt + 1}/{max_retries})")
+                status_code, response_text, proxy_ip = await fetch_hedged(url, proxy_ip, headers, _proxy)
             except RuntimeError:
                 logger.error("Все прокси заблокированы или недоступны")
-                await message.nack(requeue=True)
+                # Ждём окончания ближайшей блокировки, чтобы не гонять сообщение по кругу
+                await asyncio.sleep(min(_proxy.next_release() or 1, config.proxy.cooldown))
+                await requeue(message)
                 return
             except asyncio.TimeoutError:
                 logger.warning(f"Таймаут при запросе через прокси {proxy_ip}")
-                proxy_ip = _proxy.get()
+                _proxy.report_failure(proxy_ip)
+                proxy_ip = None
+                retry_reason = "timeout"
                 continue
             except ConnectionError as e:
                 logger.warning(f"Ошибка соединения с прокси {proxy_ip}: {e}")
-                proxy_ip = _proxy.get()
+                _proxy.report_failure(proxy_ip)
+                proxy_ip = None
+                retry_reason = "connection"
                 continue
             except Exception as e:
                 logger.warning(f"Неожиданная ошибка с прокси {proxy_ip}: {type(e).__name__}: {e}")
-                proxy_ip = _proxy.get()
+                _proxy.report_failure(proxy_ip)
+                proxy_ip = None
+                retry_reason = "error"
                 continue
 
-        # Если все попытки исчерпаны
-        logger.error(f"Не удалось обработать URL после {max_retries} попыток: {url}")
-        await message.nack(requeue=True)
+            logger.debug(f"Получен статус код: {status_code}")
+
+            if status_code == 200:
+                # Проверяем ответ до разбора DOM, чтобы не тратить CPU на challenge-страницы
+                page_kind = classify_page(response_text)
+                if page_kind == PageKind.CHALLENGE:
+                    logger.warning(f"Прокси {proxy_ip} получил challenge-страницу, пробуем следующий...")
+                    _proxy.block(proxy_ip)
+                    proxy_ip = None
+                    retry_reason = "challenge"
+                    continue
+                elif page_kind == PageKind.EMPTY:
+                    logger.warning(f"Прокси {proxy_ip} вернул пустую страницу, пробуем следующий...")
+                    _proxy.report_failure(proxy_ip)
+                    proxy_ip = None
+                    retry_reason = "empty"
+                    continue
+                elif page_kind == PageKind.NOT_FOUND:
+                    logger.info(f"Объявление {url} снято с публикации")
+                    _proxy.report_success(proxy_ip)
+                    await handle_removed(envelope)
+                    await message.ack()
+                    metrics.messages.inc(result="removed")
+                    return
+
+                logger.info(f"Успешно получена страница: {url}")
+                _proxy.report_success(proxy_ip)
+                page = response_text
+                break
+            elif status_code == 403:
+                logger.warning(f"Прокси {proxy_ip} заблокирован (403), пробуем следующий...")
+                _proxy.block(proxy_ip)
+                proxy_ip = None
+                retry_reason = "forbidden"
+                continue
+            elif status_code == 404:
+                logger.error(f"Страница не найдена: {url}")
+                await handle_removed(envelope)
+                await message.ack()  # Удаляем из очереди, т.к. страница не существует
+                metrics.messages.inc(result="removed")
+                return
+            elif status_code == 410:
+                logger.info(f"Страница {url} удалена")
+                await handle_removed(envelope)
+                await message.ack()  # Удаляем из очереди, т.к. страница не существует
+                metrics.messages.inc(result="removed")
+                return
+            else:
+                logger.warning(f"Получен статус {status_code} от {proxy_ip}, пробуем следующий...")
+                _proxy.report_failure(proxy_ip)
+                proxy_ip = None
+                retry_reason = "status"
+                continue
+
+        if page is None:
+            # Если все попытки исчерпаны
+            logger.error(f"Не удалось обработать URL после {max_retries} попыток: {url}")
+            metrics.messages.inc(result="exhausted")
+            await requeue(message)
+            return
+
+        await parse_and_store(message, url, page, session)
     finally:
-        # Явно очищаем объекты для освобождения памяти
-        if soup is not None:
-            soup.decompose()
-            del soup
-        if post is not None:
-            del post
+        _in_flight.release(in_flight_key)
+        del page
         # Принудительная сборка мусора каждые N сообщений
         gc.collect()
 
 
+async def handle_message(message: aio_pika.IncomingMessage, session: aiohttp.ClientSession):
+    """Обрабатывает сообщение, когда для его приоритета освободится слот"""
+    high = (message.priority or 0) >= config.worker.high_priority
+    async with _gate.slot(high):
+        try:
+            await process_message(message, session)
+        except Exception as e:
+            logger.error(f"Критическая ошибка при обработке сообщения: {e}")
+            try:
+                await requeue(message)
+            except Exception as nack_error:
+                logger.error(f"Не удалось вернуть сообщение в очередь: {nack_error}")
+
+
+async def consume(queue: aio_pika.abc.AbstractQueue, session: aiohttp.ClientSession):
+    """Раздаёт сообщения очереди обработчикам; количество одновременных ограничено prefetch"""
+    tasks = set()
+    async with queue.iterator(no_ack=False) as queue_iter:
+        async for message in queue_iter:
+            task = asyncio.create_task(handle_message(message, session))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+
 async def main():
     """Основная функция для обработки сообщений из RabbitMQ"""
+    global _publisher
+    # Учёт возраста задач и профилирование по SIGUSR2
+    profiler.install()
     _proxy.load()
+    # Периодически сохраняем состояние прокси, чтобы пережить перезапуск контейнера
+    snapshot_task = asyncio.create_task(_proxy.run_snapshots())
+    # История цен пишется в БД пачками в фоне
+    history_task = asyncio.create_task(price_history.run())
+    # Выгрузка локального спула в БД (записи прошлых запусков тоже)
+    spool_task = asyncio.create_task(spool.run()) if config.spool.enabled else None
+    metrics_runner = None
+    loop_lag_task = None
+    if config.metrics.enabled:
+        metrics_runner = await metrics.serve(config.metrics.host, config.metrics.port, profiler.routes)
+        loop_lag_task = asyncio.create_task(metrics.monitor_loop_lag())
     logger.info("Подключение к RabbitMQ...")
 
     # Формируем URL для подключения к RabbitMQ из конфигурации
@@ -205,30 +355,44 @@ async def main():
 
     try:
         async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            publish_channel = await connection.channel(publisher_confirms=True)
+            exchange = await declare_topology(publish_channel)
+            _publisher = Publisher(exchange, config.rabbitmq.publish_window, config.rabbitmq.publish_retries)
+
             channel = await connection.channel()
-            await channel.set_qos(prefetch_count=1)  # Обрабатываем по одному сообщению за раз
-            queue = await channel.declare_queue("post", durable=True)
-
-            logger.info("Ожидание сообщений из очереди...")
-
-            async with queue.iterator(no_ack=False) as queue_iter:
-                async for message in queue_iter:
-                    try:
-                        await process_message(message, session)
-                    except Exception as e:
-                        logger.error(f"Критическая ошибка при обработке сообщения: {e}")
-                        try:
-                            await message.nack(requeue=True)
-                        except Exception as nack_error:
-                            logger.error(f"Не удалось вернуть сообщение в очередь: {nack_error}")
+            # Общий лимит неподтверждённых сообщений на все очереди канала: слоты плюс запас на резерв.
+            # Низкоприоритетные сообщения, ждущие слот в _gate, не должны занимать всё окно, иначе брокер
+            # не доставит высокоприоритетные сообщения, для которых зарезервированы слоты
+            await channel.set_qos(prefetch_count=_gate.slots + _gate.reserved, global_=True)
+
+            queue_names = config.rabbitmq.queues or ALL_QUEUES
+            queues = [await channel.get_queue(name) for name in queue_names]
+
+            logger.info(f"Ожидание сообщений из очередей: {', '.join(queue_names)}")
+
+            await asyncio.gather(*(consume(queue, session) for queue in queues))
 
     except KeyboardInterrupt:
         logger.info("Получен сигнал остановки...")
     except Exception as e:
         logger.error(f"Критическая ошибка в main: {e}")
     finally:
+        snapshot_task.cancel()
+        _proxy.save()
+        # При отмене задача записывает остаток буфера
+        if spool_task is not None:
+            # Невыгруженные записи остаются на диске до следующего запуска
+            spool_task.cancel()
+            await asyncio.gather(spool_task, return_exceptions=True)
+        history_task.cancel()
+        await asyncio.gather(history_task, return_exceptions=True)
+        if loop_lag_task is not None:
+            loop_lag_task.cancel()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         await connection.close()
         logger.info("Соединение с RabbitMQ закрыто")
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
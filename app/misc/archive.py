@@ -0,0 +1,119 @@
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Iterator
+
+from ..core.config import load_config
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен, по умолчанию используется gzip
+    zstandard = None
+
+config = load_config()
+
+INDEX_FILE = "index.jsonl"
+SEGMENT_TEMPLATE = "segment-{:06d}.dat"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Для ARCHIVE_CODEC=zstd требуется пакет zstandard")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class HtmlArchive:
+    """
+    Архив сырых HTML страниц: сжатые записи дописываются в сегментные файлы,
+    а индекс (index.jsonl) хранит положение каждой записи по ID объявления.
+    """
+
+    def __init__(self, directory: str, codec: str = "gzip", segment_size: int = 256 * 1024 * 1024):
+        if codec not in ("gzip", "zstd"):
+            raise ValueError(f"Неизвестный алгоритм сжатия архива: {codec}")
+
+        self.directory = directory
+        self.codec = codec
+        self.segment_size = segment_size
+        self._lock = threading.Lock()
+        self._segment: int | None = None
+
+    def _current_segment(self) -> int:
+        if self._segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            segments = [
+                int(name[len("segment-") : -len(".dat")])
+                for name in os.listdir(self.directory)
+                if name.startswith("segment-") and name.endswith(".dat")
+            ]
+            self._segment = max(segments, default=1)
+        return self._segment
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, SEGMENT_TEMPLATE.format(segment))
+
+    def append(self, ad_id: str, url: str, html: str):
+        """Сжимает страницу и дописывает её в текущий сегмент (блокирующая операция)"""
+        payload = _compress(html.encode("utf-8"), self.codec)
+
+        with self._lock:
+            segment = self._current_segment()
+            path = self._segment_path(segment)
+            if os.path.exists(path) and os.path.getsize(path) + len(payload) > self.segment_size:
+                segment = self._segment = segment + 1
+                path = self._segment_path(segment)
+
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(payload)
+
+            entry = {
+                "id": ad_id,
+                "url": url,
+                "segment": segment,
+                "offset": offset,
+                "length": len(payload),
+                "codec": self.codec,
+                "fetched_at": time.time(),
+            }
+            with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def entries(self, latest_only: bool = True) -> Iterator[dict]:
+        """Возвращает записи индекса; по умолчанию только последнюю версию каждого объявления"""
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return iter(())
+
+        with open(index_path, encoding="utf-8") as f:
+            # Последняя строка может быть оборвана при аварийной остановке
+            entries = []
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+
+        if latest_only:
+            entries = list({entry["id"]: entry for entry in entries}.values())
+        return iter(entries)
+
+    def read(self, entry: dict) -> str:
+        """Читает и распаковывает страницу по записи индекса"""
+        with open(self._segment_path(entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            payload = f.read(entry["length"])
+        return _decompress(payload, entry["codec"]).decode("utf-8")
+
+
+archive = HtmlArchive(config.archive.dir, config.archive.codec, config.archive.segment_size)
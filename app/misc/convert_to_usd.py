@@ -1,5 +1,22 @@
+import asyncio
+import time
+
 import aiohttp
 
+from ..core.config import load_config
+from .latency import latency
+
+config = load_config()
+
+# Фиксированный курс UZS за 1 USD для офлайн-режима (replay, бенчмарки)
+static_rate: float | None = None
+
+
+def set_static_rate(rate: float | None):
+    """Задаёт фиксированный курс вместо запроса к API (None - вернуть запрос к API)"""
+    global static_rate
+    static_rate = rate
+
 
 async def convert_uzs_to_usd(amount: int | float) -> int:
     """
@@ -14,17 +31,31 @@ async def convert_uzs_to_usd(amount: int | float) -> int:
     Raises:
         RuntimeError: Если не удалось получить курс валюты
     """
-    target_currency = 'USD'
-    url = f'https://open.er-api.com/v6/latest/{target_currency}'
-    async with aiohttp.ClientSession() as session:
-        response = await session.get(url)
-        if response.status != 200:
-            raise RuntimeError(f'Failed to convert currency: HTTP {response.status}')
-        data = await response.json()
-
-        if 'rates' not in data or 'UZS' not in data['rates']:
-            raise RuntimeError('Invalid response from currency API: missing rates data')
-
-        exchange_rate = data['rates']['UZS']
-        converted_amount = amount / exchange_rate
-        return int(round(converted_amount))
+    if static_rate is not None:
+        return int(round(amount / static_rate))
+
+    url = config.parser.currency_api_url
+    timeout = aiohttp.ClientTimeout(total=latency.timeout('currency'))
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        started = time.monotonic()
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise RuntimeError(f'Failed to convert currency: HTTP {response.status}')
+                data = await response.json()
+        except asyncio.TimeoutError as e:
+            # Таймаут учитывается как замер не меньше таймаута, чтобы перцентиль рос вместе с задержкой API
+            latency.record('currency', timeout.total)
+            raise RuntimeError(f'Failed to convert currency: timeout after {timeout.total:.1f}s') from e
+        except aiohttp.ClientError as e:
+            # Сбой API курсов не должен выглядеть как таймаут или ошибка прокси в воркере
+            raise RuntimeError(f'Failed to convert currency: {type(e).__name__}: {e}') from e
+        # Быстрые ошибки API в окно задержек не попадают, иначе они занижают перцентиль
+        latency.record('currency', time.monotonic() - started)
+
+    if 'rates' not in data or 'UZS' not in data['rates']:
+        raise RuntimeError('Invalid response from currency API: missing rates data')
+
+    exchange_rate = data['rates']['UZS']
+    converted_amount = amount / exchange_rate
+    return int(round(converted_amount))
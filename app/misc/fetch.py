@@ -0,0 +1,198 @@
+import asyncio
+import time
+from typing import Callable
+
+import cloudscraper
+import requests
+from fake_useragent import UserAgent
+from loguru import logger
+
+from ..core.config import load_config
+from .latency import latency
+from .metrics import http_responses, stage_seconds
+from .page_check import PageKind, classify_page
+from .proxy import Proxy
+
+config = load_config()
+
+ua = UserAgent()
+
+# Статусы, после которых нет смысла ждать ответа от второго прокси
+DEFINITIVE_STATUSES = {200, 404, 410}
+# Страницы со статусом 200, которые считаются окончательным ответом
+DEFINITIVE_PAGES = {PageKind.AD, PageKind.NOT_FOUND}
+
+
+def is_definitive(status_code: int, response_text: str) -> bool:
+    """
+    Окончательный ответ на запрос объявления: 404/410 или страница объявления либо сообщение
+    о его снятии. Challenge и пустая страница со статусом 200 означают проблему прокси, а не ответ.
+    Задержка учитывается в адаптивных таймаутах только для окончательных ответов: быстрые 403,
+    challenge-страницы и ошибки прокси занижали бы перцентиль
+    """
+    if status_code not in DEFINITIVE_STATUSES:
+        return False
+    return status_code != 200 or classify_page(response_text) in DEFINITIVE_PAGES
+
+
+def get_headers() -> dict:
+    """Генерирует заголовки с случайным User-Agent"""
+    return {
+        "User-Agent": ua.random,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.5",
+        "Accept-Encoding": "gzip, deflate, br",
+        "Referer": "https://www.olx.uz/",
+        "Connection": "keep-alive",
+    }
+
+
+async def fetch_with_cloudscraper(
+    url: str,
+    proxy_ip: str,
+    headers: dict,
+    timeout: float,
+    definitive: Callable[[int, str], bool] = is_definitive,
+) -> tuple[int, str]:
+    """
+    Выполняет синхронный запрос через cloudscraper в отдельном потоке
+    Возвращает (status_code, response_text)
+    """
+
+    def _fetch():
+        scraper = None
+        try:
+            if config.proxy.login and config.proxy.password:
+                proxy_with_auth = f"http://{config.proxy.login}:{config.proxy.password}@{proxy_ip}:{config.proxy.port}"
+            else:
+                proxy_with_auth = f"http://{proxy_ip}:{config.proxy.port}"
+
+            proxies = {"http": proxy_with_auth, "https": proxy_with_auth}
+
+            scraper = cloudscraper.create_scraper(browser={"browser": "chrome", "platform": "windows", "mobile": False})
+            scraper.proxies = proxies
+
+            response = scraper.get(url, headers=headers, timeout=timeout)
+            return response.status_code, response.text
+        finally:
+            # Явно закрываем scraper для освобождения ресурсов
+            if scraper is not None:
+                try:
+                    scraper.close()
+                except Exception:
+                    pass
+
+    # Выполняем синхронный код в отдельном потоке, чтобы не блокировать event loop
+    started = time.monotonic()
+    try:
+        status_code, response_text = await asyncio.to_thread(_fetch)
+    except requests.exceptions.Timeout as e:
+        # Ответ не пришёл за timeout: настоящая задержка не меньше таймаута, учитываем её так,
+        # иначе на замедлившемся прокси перцентиль и таймаут только уменьшались бы
+        latency.record("fetch", timeout, key=proxy_ip)
+        stage_seconds.observe(time.monotonic() - started, stage="fetch")
+        http_responses.inc(status="timeout", proxy=proxy_ip)
+        raise asyncio.TimeoutError(f"Нет ответа от {proxy_ip} за {timeout:.1f}с") from e
+    except Exception:
+        http_responses.inc(status="error", proxy=proxy_ip)
+        raise
+    elapsed = time.monotonic() - started
+    if definitive(status_code, response_text):
+        latency.record("fetch", elapsed, key=proxy_ip)
+    stage_seconds.observe(elapsed, stage="fetch")
+    http_responses.inc(status=status_code, proxy=proxy_ip)
+    return status_code, response_text
+
+
+class HedgeBudget:
+    """
+    Ограничивает долю дублирующих запросов: каждый обычный запрос добавляет
+    ratio токенов, каждый дублирующий забирает один.
+    """
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def take(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+hedge_budget = HedgeBudget(config.parser.hedge_budget)
+
+
+async def fetch_hedged(
+    url: str,
+    proxy_ip: str,
+    headers: dict,
+    proxy: Proxy,
+    definitive: Callable[[int, str], bool] = is_definitive,
+) -> tuple[int, str, str]:
+    """
+    Выполняет запрос через proxy_ip с адаптивным таймаутом этого прокси. Если ответ
+    не пришёл за p90 задержки пула, дублирует запрос через другой прокси и берёт
+    первый окончательный ответ (definitive); challenge или пустая страница от одного
+    прокси не отменяют запрос через другой.
+    Возвращает (status_code, response_text, proxy_ip ответившего прокси)
+    """
+    hedge_budget.deposit()
+    timeout = latency.timeout("fetch", key=proxy_ip)
+    primary = asyncio.create_task(fetch_with_cloudscraper(url, proxy_ip, headers, timeout, definitive))
+
+    delay = latency.percentile("fetch", config.parser.hedge_percentile)
+    if not config.parser.hedge_enabled or delay is None or delay >= timeout:
+        return *(await primary), proxy_ip
+
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return *primary.result(), proxy_ip
+
+    if not hedge_budget.take():
+        return *(await primary), proxy_ip
+
+    try:
+        hedge_ip = proxy.get()
+    except RuntimeError:
+        return *(await primary), proxy_ip
+
+    if hedge_ip == proxy_ip:
+        return *(await primary), proxy_ip
+
+    logger.debug(f"Прокси {proxy_ip} не ответил за {delay:.2f}с, дублируем запрос через {hedge_ip}")
+    hedge = asyncio.create_task(
+        fetch_with_cloudscraper(url, hedge_ip, headers, latency.timeout("fetch", key=hedge_ip), definitive)
+    )
+    task_ips = {primary: proxy_ip, hedge: hedge_ip}
+
+    fallback = None
+    pending = set(task_ips)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    continue
+                status_code, response_text = task.result()
+                if definitive(status_code, response_text):
+                    if fallback is not None:
+                        # Ответ другого прокси (challenge, пустая страница, 403) вызывающий код не увидит
+                        proxy.report_failure(fallback[2])
+                    return status_code, response_text, task_ips[task]
+                if fallback is None:
+                    fallback = (status_code, response_text, task_ips[task])
+    finally:
+        # Проигравший запрос отменяем; поток cloudscraper завершится по своему таймауту
+        for task in pending:
+            task.cancel()
+
+    if fallback is not None:
+        return fallback
+    # Оба запроса упали - пробрасываем ошибку основного
+    raise primary.exception()
@@ -0,0 +1,37 @@
+import hashlib
+
+from bs4 import BeautifulSoup
+
+# Контейнеры страницы объявления, из которых берутся параметры и цена. Скрипты
+# (__PRERENDERED_STATE__), счётчики просмотров, дата публикации и блок похожих
+# объявлений в них не входят и между загрузками неизменного объявления отличаются
+PARAMS_CONTAINER = {"data-testid": "ad-parameters-container"}
+PRICE_CONTAINER = {"data-testid": "ad-price-container"}
+
+
+def normalize(text: str | None) -> str:
+    """Схлопывает пробельные символы, чтобы изменения вёрстки не меняли отпечаток"""
+    if not text:
+        return ""
+    return " ".join(text.replace("\xa0", " ").split())
+
+
+def content_fingerprint(soup: BeautifulSoup, title: str | None, description: str | None) -> str | None:
+    """
+    Отпечаток содержимого объявления: заголовок, описание, параметры и цена.
+    blake2b на 16 байт - 32 hex-символа, как и ID поста.
+    Без блока параметров или цены возвращает None: такой пост всегда разбирается полностью
+    """
+    params_container = soup.find(attrs=PARAMS_CONTAINER)
+    price_container = soup.find(attrs=PRICE_CONTAINER)
+    if params_container is None or price_container is None:
+        return None
+
+    params = sorted(normalize(item.get_text(" ")) for item in params_container.find_all("p"))
+    parts = [
+        normalize(title),
+        normalize(description),
+        "\n".join(params),
+        normalize(price_container.get_text(" ")),
+    ]
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
@@ -0,0 +1,18 @@
+class InFlight:
+    """Реестр объявлений, которые сейчас обрабатываются в этом процессе"""
+
+    def __init__(self):
+        self._keys: set[str] = set()
+
+    def claim(self, key: str) -> bool:
+        """Занимает ключ; возвращает False, если объявление уже обрабатывается"""
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def release(self, key: str):
+        self._keys.discard(key)
+
+    def __len__(self):
+        return len(self._keys)
@@ -0,0 +1,52 @@
+from collections import defaultdict, deque
+
+from ..core.config import load_config
+
+config = load_config()
+
+
+class LatencyTracker:
+    """
+    Скользящее окно задержек по целям ("fetch", "polygon", ...) и ключам (IP прокси).
+    Запись без ключа относится ко всему пулу. Запрос, не дождавшийся ответа,
+    записывается значением своего таймаута: его задержка не меньше.
+    """
+
+    def __init__(self, window: int = 500, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[tuple[str, str | None], deque] = defaultdict(lambda: deque(maxlen=self.window))
+
+    def record(self, target: str, seconds: float, key: str | None = None):
+        """Добавляет замер в окно пула и, если передан ключ, в окно ключа"""
+        self._samples[(target, None)].append(seconds)
+        if key is not None:
+            self._samples[(target, key)].append(seconds)
+
+    def percentile(self, target: str, q: float, key: str | None = None) -> float | None:
+        """Возвращает q-перцентиль (0..1) или None, если замеров пока недостаточно"""
+        samples = self._samples.get((target, key))
+        if not samples or len(samples) < self.min_samples:
+            return None
+
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self, target: str, key: str | None = None) -> float:
+        """
+        Таймаут для запроса к цели: перцентиль задержки ключа (или всего пула,
+        если по ключу мало замеров) * множитель, в пределах [timeout_min, timeout_max].
+        Пока замеров нет, возвращает config.parser.request_timeout.
+        """
+        q = config.parser.timeout_percentile
+        observed = self.percentile(target, q, key)
+        if observed is None and key is not None:
+            observed = self.percentile(target, q)
+        if observed is None:
+            return config.parser.request_timeout
+
+        timeout = observed * config.parser.timeout_multiplier
+        return max(config.parser.timeout_min, min(config.parser.timeout_max, timeout))
+
+
+latency = LatencyTracker()
@@ -0,0 +1,207 @@
+import asyncio
+import bisect
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from aiohttp import web
+from loguru import logger
+
+# Границы корзин гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: list["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, object] = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple[tuple[str, str], ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}, переданы {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self):
+        """Сэмплы метрики: (суффикс имени, метки, значение)"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        for labels, value in self._values.items():
+            yield "_total", labels, value
+
+
+class Gauge(_Metric):
+    """Текущее значение"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self):
+        for labels, value in self._values.items():
+            yield "", labels, value
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # [счётчики по корзинам, сумма, количество]
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Замеряет время выполнения блока"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield "_bucket", labels + (("le", _format_value(bound)),), cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+def render() -> str:
+    """Все метрики в текстовом формате Prometheus"""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+stage_seconds = Histogram("olx_stage_seconds", "Длительность этапов обработки объявления", ("stage",))
+http_responses = Counter("olx_http_responses", "Ответы OLX по статусу и прокси", ("status", "proxy"))
+retries = Counter("olx_retries", "Повторные попытки загрузки объявления", ("reason",))
+requeues = Counter("olx_requeues", "Сообщения, возвращённые в очередь")
+messages = Counter("olx_messages", "Обработанные сообщения по результату", ("result",))
+queue_lag = Histogram(
+    "olx_queue_lag_seconds",
+    "Время от постановки сообщения в очередь до начала обработки",
+    buckets=(1, 5, 15, 30, 60, 300, 900, 1800, 3600, 4 * 3600, 12 * 3600, 24 * 3600),
+)
+extractor_seconds = Histogram(
+    "olx_extractor_seconds",
+    "Длительность этапов парсинга страницы по парсерам",
+    ("parser", "stage"),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+db_pool_wait_seconds = Histogram(
+    "olx_db_pool_wait_seconds",
+    "Ожидание соединения из пула БД",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+db_pool_in_use = Gauge("olx_db_pool_in_use", "Соединения БД, выданные из пула")
+db_pool_overflow = Gauge("olx_db_pool_overflow", "Открытые соединения сверх DB_POOL_SIZE")
+db_pool_overflow_events = Counter("olx_db_pool_overflow_events", "Открытия соединений сверх DB_POOL_SIZE")
+db_pool_timeouts = Counter("olx_db_pool_timeouts", "Не дождались соединения из пула за DB_POOL_TIMEOUT")
+spool_backlog = Gauge("olx_spool_backlog_bytes", "Объём спула, ещё не выгруженный в БД")
+spool_records = Counter("olx_spool_records", "Записи спула по результату выгрузки", ("result",))
+spool_flush_errors = Counter("olx_spool_flush_errors", "Неудачные попытки выгрузки спула в БД")
+loop_lag = Gauge("olx_event_loop_lag_seconds", "Последняя измеренная задержка event loop")
+loop_lag_seconds = Histogram(
+    "olx_event_loop_lag_distribution_seconds",
+    "Распределение задержки event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+async def monitor_loop_lag(interval: float = 1.0):
+    """Измеряет, насколько позже запланированного просыпается задача - задержку event loop"""
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.monotonic() - started - interval)
+        loop_lag.set(lag)
+        loop_lag_seconds.observe(lag)
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(body=render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def serve(host: str, port: int, routes: list[web.RouteDef] | None = None) -> web.AppRunner:
+    """Запускает HTTP сервер с /metrics; остановка - await runner.cleanup()"""
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    if routes:
+        app.router.add_routes(routes)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+    return runner
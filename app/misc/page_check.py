@@ -0,0 +1,50 @@
+import enum
+
+
+class PageKind(str, enum.Enum):
+    AD = "ad"  # Страница объявления
+    CHALLENGE = "challenge"  # Cloudflare challenge / капча
+    NOT_FOUND = "not_found"  # Объявление снято, но сервер ответил 200
+    EMPTY = "empty"  # Пустая оболочка без содержимого объявления
+
+
+# Challenge-страницы маленькие, маркеры ищем только в начале ответа
+CHALLENGE_SCAN_BYTES = 16 * 1024
+CHALLENGE_MARKERS = (
+    "cf_chl_opt",
+    "challenge-platform",
+    "cf-chl-",
+    "<title>Just a moment...</title>",
+    "Attention Required! | Cloudflare",
+    "g-recaptcha",
+    "h-captcha",
+)
+NOT_FOUND_MARKERS = (
+    'data-testid="ad-inactive-msg"',
+    "Объявление больше не доступно",
+    "Это объявление больше не доступно",
+    "Объявление не найдено",
+)
+AD_MARKER = 'data-testid="breadcrumbs"'
+MIN_AD_PAGE_SIZE = 2 * 1024
+
+
+def classify_page(html: str) -> PageKind:
+    """
+    Дешёвая классификация ответа со статусом 200 по подстрокам,
+    до построения DOM и запуска парсера
+    """
+    has_ad = AD_MARKER in html
+
+    # Настоящая страница объявления тоже может подключать капчу, поэтому
+    # challenge определяем только при отсутствии разметки объявления
+    if not has_ad and any(marker in html[:CHALLENGE_SCAN_BYTES] for marker in CHALLENGE_MARKERS):
+        return PageKind.CHALLENGE
+
+    if any(marker in html for marker in NOT_FOUND_MARKERS):
+        return PageKind.NOT_FOUND
+
+    if not has_ad or len(html) < MIN_AD_PAGE_SIZE:
+        return PageKind.EMPTY
+
+    return PageKind.AD
@@ -0,0 +1,123 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import signal
+import time
+import weakref
+
+from aiohttp import web
+from loguru import logger
+
+from ..core.config import load_config
+
+config = load_config()
+
+# Время создания задач (time.monotonic), заполняется фабрикой задач из install()
+_created: "weakref.WeakKeyDictionary[asyncio.Task, float]" = weakref.WeakKeyDictionary()
+_lock = asyncio.Lock()
+
+
+def _task_factory(loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    _created[task] = time.monotonic()
+    return task
+
+
+def dump_tasks() -> str:
+    """Список задач event loop: сколько секунд каждая существует и где сейчас ожидает"""
+    now = time.monotonic()
+    rows = []
+    for task in asyncio.all_tasks():
+        created = _created.get(task)
+        age = now - created if created is not None else None
+        frames = task.get_stack(limit=1)
+        where = f"{frames[0].f_code.co_filename}:{frames[0].f_lineno}" if frames else "-"
+        coro = task.get_coro()
+        rows.append((age, task.get_name(), getattr(coro, "__qualname__", repr(coro)), where))
+
+    rows.sort(key=lambda row: -1 if row[0] is None else row[0], reverse=True)
+    lines = [f"Задач: {len(rows)}", f"{'секунд':>10}  {'задача':<20} {'корутина':<45} ожидает в"]
+    for age, name, coro, where in rows:
+        age_text = "?" if age is None else f"{age:.1f}"
+        lines.append(f"{age_text:>10}  {name:<20} {coro:<45} {where}")
+    return "\n".join(lines) + "\n"
+
+
+async def profile(seconds: float) -> tuple[str, str]:
+    """
+    Профилирует поток event loop в течение seconds секунд (cProfile; код в asyncio.to_thread
+    не попадает). Пишет <PROFILE_DIR>/profile-<время>.pstats и список задач рядом.
+    Возвращает (путь к файлу статистики, текстовая сводка)
+    """
+    if _lock.locked():
+        raise RuntimeError("Профилирование уже выполняется")
+
+    async with _lock:
+        os.makedirs(config.profiling.profile_dir, exist_ok=True)
+        prefix = os.path.join(config.profiling.profile_dir, time.strftime("%Y%m%d-%H%M%S"))
+        logger.warning(f"Профилирование event loop на {seconds}с")
+
+        with open(f"{prefix}-tasks-before.txt", "w", encoding="utf-8") as file:
+            file.write(dump_tasks())
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+        stats_path = f"{prefix}-profile.pstats"
+        profiler.dump_stats(stats_path)
+        with open(f"{prefix}-tasks-after.txt", "w", encoding="utf-8") as file:
+            file.write(dump_tasks())
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+        logger.warning(f"Профиль сохранён: {stats_path}")
+        return stats_path, summary.getvalue()
+
+
+def _on_signal():
+    async def run():
+        try:
+            await profile(config.profiling.profile_seconds)
+        except RuntimeError as e:
+            logger.warning(str(e))
+
+    asyncio.get_running_loop().create_task(run(), name="profiler")
+
+
+def install():
+    """Фабрика задач для учёта их возраста и профилирование по SIGUSR2; вызывается из работающего loop"""
+    loop = asyncio.get_running_loop()
+    loop.set_task_factory(_task_factory)
+    try:
+        loop.add_signal_handler(signal.SIGUSR2, _on_signal)
+    except (NotImplementedError, AttributeError):
+        # Нет SIGUSR2 / сигналов в loop (Windows) - остаётся только эндпоинт
+        pass
+
+
+async def _handle_profile(request: web.Request) -> web.Response:
+    try:
+        seconds = min(float(request.query.get("seconds", config.profiling.profile_seconds)), 300.0)
+    except ValueError:
+        return web.Response(status=400, text="seconds должен быть числом\n")
+    try:
+        stats_path, summary = await profile(seconds)
+    except RuntimeError as e:
+        return web.Response(status=409, text=f"{e}\n")
+    return web.Response(text=f"{stats_path}\n\n{summary}")
+
+
+async def _handle_tasks(request: web.Request) -> web.Response:
+    return web.Response(text=dump_tasks())
+
+
+routes = [
+    web.get("/debug/profile", _handle_profile),
+    web.get("/debug/tasks", _handle_tasks),
+]
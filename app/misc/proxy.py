@@ -1,3 +1,8 @@
+import asyncio
+import json
+import os
+import time
+
 import aiohttp
 import logging
 
@@ -11,11 +16,80 @@ class Proxy:
     def __init__(self):
         self.proxies = {}
 
+    @staticmethod
+    def _initial_state() -> dict:
+        return {"count": 0, "is_blocked": False, "blocked_until": None, "failures": 0}
+
     def load(self):
         for ip in config.proxy.ips:
-            self.proxies[ip] = {"count": 0, "is_blocked": False}
+            self.proxies[ip] = self._initial_state()
+        self.restore()
+
+    def restore(self, path: str | None = None):
+        """Восстанавливает состояние прокси из снимка, сохранённого до перезапуска"""
+        path = path or config.proxy.state_path
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read proxy state from {path}: {e}")
+            return
+
+        now = time.time()
+        restored = 0
+        for ip, data in snapshot.get("proxies", {}).items():
+            # Прокси, которых больше нет в конфигурации, игнорируем
+            if ip not in self.proxies:
+                continue
+
+            state = self.proxies[ip]
+            state["count"] = int(data.get("count", 0))
+            state["failures"] = int(data.get("failures", 0))
+
+            blocked_until = data.get("blocked_until")
+            if data.get("is_blocked") and blocked_until is not None and blocked_until > now:
+                state["is_blocked"] = True
+                state["blocked_until"] = blocked_until
+            else:
+                # Истёкшая блокировка и накопленные ошибки не переносятся
+                state["failures"] = 0
+            restored += 1
+
+        logger.info(f"Restored state of {restored} proxies from {path}")
+
+    def save(self, path: str | None = None):
+        """Атомарно сохраняет снимок состояния прокси на диск"""
+        path = path or config.proxy.state_path
+        tmp_path = f"{path}.tmp"
+        snapshot = {"saved_at": time.time(), "proxies": self.proxies}
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to save proxy state to {path}: {e}")
+
+    async def run_snapshots(self, interval: int | None = None):
+        """Периодически сохраняет состояние прокси (запускается фоновой задачей)"""
+        interval = interval or config.proxy.state_save_interval
+        while True:
+            await asyncio.sleep(interval)
+            self.save()
+
+    def _release_expired(self):
+        now = time.time()
+        for ip, data in self.proxies.items():
+            if data["is_blocked"] and data["blocked_until"] is not None and data["blocked_until"] <= now:
+                data["is_blocked"] = False
+                data["blocked_until"] = None
+                data["failures"] = 0
+                logger.info(f"Proxy {ip} cooldown expired")
 
     def get(self):
+        self._release_expired()
+
         available_proxies = {ip: data for ip, data in self.proxies.items() if not data["is_blocked"]}
         if not available_proxies:
             logger.error("No available proxies - all proxies are blocked")
@@ -31,10 +105,12 @@ class Proxy:
 
         return least_used_ip
 
-    def block(self, ip: str):
-        """Блокирует прокси (например, при обнаружении бана)"""
+    def block(self, ip: str, cooldown: int | None = None):
+        """Блокирует прокси (например, при обнаружении бана) на время cooldown"""
         if ip in self.proxies:
+            cooldown = config.proxy.cooldown if cooldown is None else cooldown
             self.proxies[ip]["is_blocked"] = True
+            self.proxies[ip]["blocked_until"] = time.time() + cooldown if cooldown else None
             logger.warning(f"Proxy {ip} has been blocked (used {self.proxies[ip]['count']} times)")
         else:
             logger.error(f"Attempted to block unknown proxy: {ip}")
@@ -43,10 +119,38 @@ class Proxy:
         """Разблокирует прокси"""
         if ip in self.proxies:
             self.proxies[ip]["is_blocked"] = False
+            self.proxies[ip]["blocked_until"] = None
+            self.proxies[ip]["failures"] = 0
             logger.info(f"Proxy {ip} has been unblocked")
         else:
             logger.error(f"Attempted to unblock unknown proxy: {ip}")
 
+    def report_success(self, ip: str):
+        """Сбрасывает счётчик ошибок прокси после успешного запроса"""
+        if ip in self.proxies:
+            self.proxies[ip]["failures"] = 0
+
+    def report_failure(self, ip: str):
+        """Учитывает ошибку прокси и блокирует его после max_failures ошибок подряд"""
+        if ip not in self.proxies:
+            logger.error(f"Attempted to report failure of unknown proxy: {ip}")
+            return
+
+        self.proxies[ip]["failures"] += 1
+        if self.proxies[ip]["failures"] >= config.proxy.max_failures:
+            self.block(ip)
+
+    def next_release(self) -> float | None:
+        """Возвращает число секунд до ближайшей разблокировки прокси"""
+        blocked_until = [
+            data["blocked_until"]
+            for data in self.proxies.values()
+            if data["is_blocked"] and data["blocked_until"] is not None
+        ]
+        if not blocked_until:
+            return None
+        return max(0.0, min(blocked_until) - time.time())
+
     def reset_counters(self):
         """Сбрасывает счётчики использования всех прокси"""
         for ip in self.proxies:
@@ -0,0 +1,61 @@
+import asyncio
+
+import aio_pika
+from loguru import logger
+
+
+class Publisher:
+    """
+    Конвейерная публикация в RabbitMQ поверх канала с publisher confirms.
+    Одновременно ожидается не более window подтверждений; неподтверждённые
+    сообщения публикуются повторно до retries раз.
+    """
+
+    def __init__(self, exchange: aio_pika.abc.AbstractExchange, window: int = 256, retries: int = 3):
+        self.exchange = exchange
+        self.retries = retries
+        self._window = asyncio.Semaphore(window)
+        self._pending: set[asyncio.Task] = set()
+        self._failed = 0
+
+    async def _publish(self, message: aio_pika.Message, routing_key: str) -> bool:
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    # При publisher confirms publish завершается после подтверждения брокера
+                    await self.exchange.publish(message, routing_key=routing_key)
+                    return True
+                except Exception as e:
+                    if attempt == self.retries:
+                        logger.error(f"Сообщение не подтверждено брокером ({routing_key}): {type(e).__name__}: {e}")
+                        self._failed += 1
+                        return False
+                    logger.warning(f"Повторная публикация ({attempt + 1}/{self.retries}) в {routing_key}: {e}")
+                    await asyncio.sleep(0.5 * 2**attempt)
+        finally:
+            self._window.release()
+
+    async def publish(self, message: aio_pika.Message, routing_key: str) -> asyncio.Task:
+        """
+        Ставит сообщение в конвейер; ждёт только освобождения места в окне.
+        Возвращает задачу публикации, её результат - подтверждено ли сообщение брокером
+        """
+        await self._window.acquire()
+        task = asyncio.create_task(self._publish(message, routing_key))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def send(self, message: aio_pika.Message, routing_key: str):
+        """Публикует сообщение и дожидается его подтверждения"""
+        await self._window.acquire()
+        if not await self._publish(message, routing_key):
+            raise RuntimeError(f"Сообщение не подтверждено брокером ({routing_key})")
+
+    async def flush(self) -> int:
+        """Дожидается подтверждения всех сообщений в конвейере, возвращает число неподтверждённых"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending))
+
+        failed, self._failed = self._failed, 0
+        return failed
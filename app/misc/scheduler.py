@@ -0,0 +1,55 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class PriorityGate:
+    """
+    Ограничивает количество одновременно обрабатываемых сообщений slots слотами,
+    из которых reserved доступны только сообщениям с высоким приоритетом.
+    Пока высокоприоритетное сообщение ждёт слот, низкоприоритетные не допускаются.
+    """
+
+    def __init__(self, slots: int, reserved: int):
+        self.slots = max(1, slots)
+        self.reserved = max(0, min(reserved, self.slots - 1))
+        self.in_use = 0
+        self.low_in_use = 0
+        self.high_waiting = 0
+        self._condition = asyncio.Condition()
+
+    def _low_allowed(self) -> bool:
+        return (
+            self.high_waiting == 0
+            and self.in_use < self.slots
+            and self.low_in_use < self.slots - self.reserved
+        )
+
+    async def acquire(self, high: bool):
+        async with self._condition:
+            if high:
+                self.high_waiting += 1
+                try:
+                    await self._condition.wait_for(lambda: self.in_use < self.slots)
+                finally:
+                    self.high_waiting -= 1
+            else:
+                await self._condition.wait_for(self._low_allowed)
+                self.low_in_use += 1
+            self.in_use += 1
+            # Низкоприоритетные сообщения ждали, пока очередь высокоприоритетных не опустеет
+            self._condition.notify_all()
+
+    async def release(self, high: bool):
+        async with self._condition:
+            self.in_use -= 1
+            if not high:
+                self.low_in_use -= 1
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, high: bool):
+        await self.acquire(high)
+        try:
+            yield
+        finally:
+            await self.release(high)
@@ -0,0 +1,61 @@
+import json
+import os
+import random
+import time
+
+from loguru import logger
+
+from ..core.config import load_config
+
+config = load_config()
+
+
+class SlowPageSampler:
+    """
+    Сохраняет страницы, парсинг которых занял больше threshold секунд, вместе с разбивкой
+    времени по этапам, чтобы их можно было воспроизвести (python -m bench.parsers --import)
+    """
+
+    def __init__(self, directory: str, threshold: float, sample_rate: float = 1.0, max_files: int = 500):
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self._saved = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def should_capture(self, seconds: float) -> bool:
+        if not self.enabled or seconds < self.threshold:
+            return False
+        if self._saved is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._saved = sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+        return self._saved < self.max_files and random.random() < self.sample_rate
+
+    def capture(self, key: str, url: str, html: str, seconds: float, timings: dict[str, float]):
+        """Пишет <key>-<время>.html и .json с разбивкой; вызывается в отдельном потоке"""
+        name = f"{key}-{int(time.time() * 1000)}"
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.html", "w", encoding="utf-8") as file:
+            file.write(html)
+        breakdown = {
+            "url": url,
+            "seconds": round(seconds, 6),
+            "html_size": len(html),
+            "timings": {stage: round(value, 6) for stage, value in sorted(timings.items(), key=lambda item: -item[1])},
+        }
+        with open(f"{path}.json", "w", encoding="utf-8") as file:
+            json.dump(breakdown, file, ensure_ascii=False, indent=2)
+        self._saved += 1
+        logger.warning(f"Медленная страница {url}: {seconds:.3f}с, сохранена в {path}.html")
+
+
+slow_pages = SlowPageSampler(
+    config.profiling.slow_page_dir,
+    config.profiling.slow_page_threshold,
+    config.profiling.slow_page_sample_rate,
+    config.profiling.slow_page_max_files,
+)
@@ -0,0 +1,42 @@
+import aio_pika
+
+from ..core.config import load_config
+from ..models.post import TypeOfProperty, TypeOfService
+
+config = load_config()
+
+EXCHANGE_NAME = "posts"
+# Очередь для ссылок без известного типа (старые продюсеры публикуют в неё напрямую)
+LEGACY_QUEUE = "post"
+UNKNOWN_ROUTING_KEY = "post.unknown"
+
+# Очередь на каждую пару (тип недвижимости, вид услуги); имя очереди совпадает с ключом маршрутизации
+TYPED_QUEUES = [f"post.{p.value}.{s.value}" for p in TypeOfProperty for s in TypeOfService]
+ALL_QUEUES = [*TYPED_QUEUES, LEGACY_QUEUE]
+
+# Приоритеты сообщений: свежие объявления обрабатываются раньше перепроверок
+PRIORITY_FRESH = 9  # Новое объявление, опубликованное сегодня
+PRIORITY_NEW = 5  # Новое объявление
+PRIORITY_RECHECK = 1  # Перепроверка уже сохранённого объявления
+
+
+def routing_key(type_of_property: TypeOfProperty | None, type_of_service: TypeOfService | None) -> str:
+    """Ключ маршрутизации по категории объявления"""
+    if type_of_property is None or type_of_service is None:
+        return UNKNOWN_ROUTING_KEY
+    return f"post.{TypeOfProperty(type_of_property).value}.{TypeOfService(type_of_service).value}"
+
+
+async def declare_topology(channel: aio_pika.abc.AbstractChannel) -> aio_pika.abc.AbstractExchange:
+    """Объявляет topic exchange, очереди по типам и привязки; возвращает exchange"""
+    exchange = await channel.declare_exchange(EXCHANGE_NAME, aio_pika.ExchangeType.TOPIC, durable=True)
+    arguments = {"x-max-priority": config.rabbitmq.max_priority} if config.rabbitmq.max_priority else None
+
+    for name in TYPED_QUEUES:
+        queue = await channel.declare_queue(name, durable=True, arguments=arguments)
+        await queue.bind(exchange, routing_key=name)
+
+    legacy = await channel.declare_queue(LEGACY_QUEUE, durable=True, arguments=arguments)
+    await legacy.bind(exchange, routing_key=UNKNOWN_ROUTING_KEY)
+
+    return exchange
@@ -0,0 +1,63 @@
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pydantic import BaseModel, field_validator
+
+from ..core.config import load_config
+
+config = load_config()
+
+# Ссылка на объявление OLX заканчивается на "-ID<идентификатор>.html"
+AD_ID_PATTERN = re.compile(r"-ID([0-9A-Za-z]+)\.html")
+
+OLX_HOSTS = {"olx.uz", "www.olx.uz", "m.olx.uz"}
+CANONICAL_OLX_HOST = "www.olx.uz"
+# Параметры, которые не влияют на содержимое страницы
+TRACKING_PARAMS = {"reason", "search_reason", "sr", "ref", "from", "fbclid", "gclid", "yclid"}
+
+
+def ad_id_from_url(url: str) -> str | None:
+    """Извлекает идентификатор объявления из ссылки OLX"""
+    match = AD_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Приводит ссылку к каноническому виду: https и www.olx.uz для хостов OLX,
+    без параметров отслеживания и фрагмента
+    """
+    parsed = urlsplit(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+
+    if parsed.hostname in OLX_HOSTS:
+        scheme = "https"
+        netloc = CANONICAL_OLX_HOST
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    ]
+    return urlunsplit((scheme, netloc, parsed.path or "/", urlencode(sorted(query)), ""))
+
+
+class URLValidator(BaseModel):
+    url: str
+
+    @field_validator("url")
+    @classmethod
+    def validate_url(cls, v: str) -> str:
+        parsed = urlsplit(v.strip())
+        if not parsed.scheme or not parsed.netloc:
+            raise ValueError("Невалидный URL")
+
+        v = canonicalize_url(v)
+
+        # Проверяем, что домен в whitelist
+        domain = urlsplit(v).netloc
+        if domain not in config.parser.allowed_domains:
+            raise ValueError(f"Домен {domain} не разрешен для парсинга")
+
+        return v
@@ -0,0 +1,54 @@
+import json
+import os
+
+from loguru import logger
+
+
+class Watermark:
+    """
+    Множество последних увиденных ID объявлений по каждой категории выдачи.
+    Хранит не более size ID на категорию, самые старые вытесняются.
+    """
+
+    def __init__(self, path: str, size: int = 5000):
+        self.path = path
+        self.size = size
+        # dict используется как упорядоченное множество
+        self.categories: dict[str, dict[str, None]] = {}
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Не удалось прочитать watermark из {self.path}: {e}")
+            return
+
+        self.categories = {category: dict.fromkeys(ids) for category, ids in data.items()}
+
+    def save(self):
+        """Атомарно сохраняет watermark на диск"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({category: list(ids) for category, ids in self.categories.items()}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить watermark в {self.path}: {e}")
+
+    def is_known(self, category: str, ad_id: str) -> bool:
+        return ad_id in self.categories.get(category, {})
+
+    def add(self, category: str, ad_ids: list[str]):
+        """Добавляет ID в порядке выдачи (самые новые первыми)"""
+        known = self.categories.setdefault(category, {})
+        # Самые новые ID должны оказаться в конце, чтобы вытесняться последними
+        for ad_id in reversed(ad_ids):
+            known.pop(ad_id, None)
+            known[ad_id] = None
+
+        # Вытесняем самые старые ID сверх лимита
+        for ad_id in list(known)[: max(0, len(known) - self.size)]:
+            del known[ad_id]
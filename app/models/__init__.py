@@ -8,6 +8,7 @@ from .post_sale_house import PostSaleHouse
 from .post_rent_apartment import PostRentApartment
 from .post_rent_commerce import PostRentCommerce
 from .post_rent_house import PostRentHouse
+from .post_price_history import PostPriceHistory
 
 
 __all__ = {
@@ -21,4 +22,5 @@ __all__ = {
     "PostRentApartment",
     "PostRentCommerce",
     "PostRentHouse",
+    "PostPriceHistory",
 }
@@ -1,5 +1,8 @@
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import MetaData
+from sqlalchemy import BIGINT, INTEGER, MetaData
+
+# BIGINT для автоинкрементных первичных ключей: в SQLite автоинкремент работает только у INTEGER PRIMARY KEY
+BigIntPK = BIGINT().with_variant(INTEGER(), "sqlite")
 
 
 class Base(DeclarativeBase):
@@ -1,25 +1,79 @@
+import time
 from typing import Any, AsyncGenerator
 
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
     async_scoped_session,
     AsyncSession,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from asyncio import current_task
 from ..core.config import load_config
+from ..misc import metrics
 
 config = load_config()
 
 
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """Настройки каждого соединения SQLite: WAL для параллельного чтения, внешние ключи как в MySQL"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул соединений, отдающий в метрики ожидание соединения, занятость и переполнение"""
+
+    def _do_get(self):
+        overflow = self._overflow
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.db_pool_timeouts.inc()
+            raise
+        finally:
+            metrics.db_pool_wait_seconds.observe(time.perf_counter() - started)
+            if self._overflow > max(overflow, 0):
+                metrics.db_pool_overflow_events.inc()
+            self._report()
+
+    def _do_return_conn(self, record):
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self._report()
+
+    def _report(self):
+        metrics.db_pool_in_use.set(self.checkedout())
+        metrics.db_pool_overflow.set(max(self._overflow, 0))
+
+
 class DataBaseHelper:
-    def __init__(self):
-        self.engine = create_async_engine(
-            f"mysql+aiomysql://{config.db.user}:{config.db.password}@{config.db.hostname}:{config.db.port}/{config.db.db_name}",
-            echo=config.db.db_echo,
-            pool_pre_ping=True,  # проверяет соединение перед использованием
-            pool_recycle=1800,  # пересоздаёт каждые 30 минут (меньше чем wait_timeout)
-        )
+    def __init__(self, url: str = config.db.url):
+        self.dialect = make_url(url).get_backend_name()
+        if self.dialect == "sqlite":
+            # Локальные бенчмарки и проверки без сервера MySQL
+            self.engine = create_async_engine(url, echo=config.db.db_echo)
+            event.listen(self.engine.sync_engine, "connect", _sqlite_pragmas)
+        else:
+            self.engine = create_async_engine(
+                url,
+                echo=config.db.db_echo,
+                poolclass=InstrumentedPool,
+                # Каждому одновременно обрабатываемому сообщению - своё соединение, плюс запись истории цен
+                pool_size=config.db.pool_size or config.worker.concurrency + 1,
+                max_overflow=config.db.max_overflow,
+                pool_timeout=config.db.pool_timeout,
+                pool_pre_ping=config.db.pool_pre_ping,  # проверяет соединение перед использованием
+                pool_recycle=config.db.pool_recycle,  # пересоздаёт старые (меньше чем wait_timeout)
+            )
         self.session_factory = async_sessionmaker(
             bind=self.engine, autoflush=False, autocommit=False, expire_on_commit=False
         )
@@ -37,5 +91,15 @@ class DataBaseHelper:
         finally:
             await session.remove()
 
+    async def create_all(self):
+        """
+        Создаёт таблицы по моделям, если их нет. Для SQLite и пустых тестовых баз:
+        схему MySQL ведут миграции alembic
+        """
+        from .base import Base
+
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
 
 db_helper = DataBaseHelper()
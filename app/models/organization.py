@@ -1,8 +1,8 @@
 import enum
 from typing import TYPE_CHECKING
-from sqlalchemy import BIGINT, Enum, VARCHAR
+from sqlalchemy import Enum, VARCHAR, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from .base import Base
+from .base import Base, BigIntPK
 
 if TYPE_CHECKING:
     from .post import Post
@@ -16,7 +16,9 @@ class Platform(str, enum.Enum):
 
 class Organization(Base):
     __tablename__ = "organizations"
-    id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=True)
+    # Одна организация на URL продавца: параллельные обработчики не создают дубликатов
+    __table_args__ = (UniqueConstraint("platform", "url", name="uq_organizations_platform_url"),)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
     platform: Mapped[Platform] = mapped_column(Enum(Platform, values_callable=lambda x: [i.value for i in x]))
     is_broker: Mapped[bool] = mapped_column(default=False)
     url: Mapped[str | None] = mapped_column(VARCHAR(255))
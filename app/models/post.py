@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime, UTC
 from typing import TYPE_CHECKING
 
-from sqlalchemy import CHAR, TEXT, Enum, BIGINT, VARCHAR, ForeignKey, func
+from sqlalchemy import CHAR, TEXT, Enum, BIGINT, VARCHAR, ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship, selectinload
 
 from .base import Base
@@ -16,6 +16,7 @@ if TYPE_CHECKING:
         PostRentApartment,
         PostRentCommerce,
         PostRentHouse,
+        PostPriceHistory,
         Organization,
     )
 
@@ -40,10 +41,12 @@ class Source(str, enum.Enum):
 class Status(str, enum.Enum):
     ACTIVE = "active"
     VERIFIED = "verified"
+    REMOVED = "removed"
 
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (Index("ix_posts_source_external_id", "source", "external_id"),)
     id: Mapped[str] = mapped_column(CHAR(32), primary_key=True, default=lambda: uuid.uuid4().hex)
     type_of_property: Mapped[TypeOfProperty] = mapped_column(
         Enum(TypeOfProperty, values_callable=lambda x: [i.value for i in x])
@@ -63,10 +66,17 @@ class Post(Base):
     polygon_id: Mapped[int | None] = mapped_column(BIGINT, default=None)
     organization_id: Mapped[int] = mapped_column(BIGINT, ForeignKey("organizations.id"))
     is_broker: Mapped[bool]
+    # blake2b-отпечаток заголовка, описания, параметров и цены (см. misc.fingerprint)
+    content_hash: Mapped[str | None] = mapped_column(CHAR(32), default=None)
     added_at: Mapped[datetime] = mapped_column(default=datetime.now(UTC), server_default=func.current_timestamp())
     updated_at: Mapped[datetime] = mapped_column(
-        default=datetime.now(UTC), server_default=func.current_timestamp(), onupdate=func.current_timestamp()
+        default=datetime.now(UTC),
+        server_default=func.current_timestamp(),
+        onupdate=func.current_timestamp(),
+        index=True,
     )
+    # Когда пост последний раз опубликован на перепроверку (см. revisit.py)
+    revisit_enqueued_at: Mapped[datetime | None] = mapped_column(default=None)
 
     # Relationship
     sale_apartment: Mapped["PostSaleApartment"] = relationship(back_populates="post")
@@ -76,6 +86,7 @@ class Post(Base):
     rent_commerce: Mapped["PostRentCommerce"] = relationship(back_populates="post")
     rent_house: Mapped["PostRentHouse"] = relationship(back_populates="post")
     organization: Mapped["Organization"] = relationship(back_populates="posts")
+    price_history: Mapped[list["PostPriceHistory"]] = relationship(back_populates="post")
 
     @classmethod
     def get_options(cls):
@@ -0,0 +1,34 @@
+import enum
+from datetime import datetime, UTC
+from typing import TYPE_CHECKING
+
+from sqlalchemy import CHAR, BIGINT, Enum, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base, BigIntPK
+
+if TYPE_CHECKING:
+    from models import Post
+
+
+class Currency(str, enum.Enum):
+    USD = "usd"
+    UZS = "uzs"
+
+
+class PostPriceHistory(Base):
+    __tablename__ = "post_price_history"
+    # Выборка истории цен поста за период - по индексу, без обращения к таблицам деталей
+    __table_args__ = (Index("ix_post_price_history_post_id_observed_at", "post_id", "observed_at"),)
+    id: Mapped[int] = mapped_column(BigIntPK, primary_key=True, autoincrement=True)
+    post_id: Mapped[str] = mapped_column(CHAR(32), ForeignKey("posts.id"))
+    observed_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(UTC), server_default=func.current_timestamp()
+    )
+    price_usd: Mapped[int] = mapped_column(BIGINT)
+    original_currency: Mapped[Currency] = mapped_column(
+        Enum(Currency, values_callable=lambda x: [i.value for i in x])
+    )
+
+    # Relationship
+    post: Mapped["Post"] = relationship(back_populates="price_history")
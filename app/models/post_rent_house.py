@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import CHAR, SMALLINT, BIGINT, Enum, ForeignKey
+from sqlalchemy import CHAR, SMALLINT, BIGINT, Double, Enum, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -19,6 +19,7 @@ class PostRentHouse(Base):
     total_area_sqm: Mapped[int | None] = mapped_column(BIGINT)
     land_area_sqm: Mapped[int | None] = mapped_column(BIGINT)
     total_price: Mapped[int | None] = mapped_column(BIGINT)
+    price_per_square: Mapped[float | None] = mapped_column(Double)
     has_furniture: Mapped[bool | None]
     building_material: Mapped[BuildingMaterial | None] = mapped_column(
         Enum(BuildingMaterial, values_callable=lambda x: [i.value for i in x])
@@ -4,13 +4,14 @@ import re
 import aiohttp
 from bs4 import BeautifulSoup
 from loguru import logger
-from sqlalchemy import and_
 
 from ..exception import ParserError
 from ..schemas.post_apartment import PostApartment as PostApartmentSchemas
 from ..core.config import load_config
 from ..models.post_sale_apartment import BuildingMaterial, Repair
 from ..models.post import TypeOfProperty
+from ..models.post_price_history import Currency
+from ..schemas.records import ApartmentRecord
 from .parse_post import BaseParser
 from ..misc.convert_to_usd import convert_uzs_to_usd
 
@@ -20,15 +21,17 @@ config = load_config()
 
 class ApartmentParse(BaseParser):
     type_of_property = TypeOfProperty.APARTMENT.value
+    record_type = ApartmentRecord
 
-    def __init__(self, url: str, soup: BeautifulSoup, session: aiohttp.ClientSession):
-        super().__init__(url, soup, session)
+    def __init__(self, url: str, soup: BeautifulSoup, session: aiohttp.ClientSession, html: str | None = None):
+        super().__init__(url, soup, session, html)
 
         self.rooms: int | None = None
         self.floor: int | None = None
         self.total_floor: int | None = None
         self.total_area_sqm: int | None = None
         self.total_price: int | None = None
+        self.currency: Currency | None = None
         self.is_new_building: bool = False
         self.has_furniture: bool = False
         self.repair: Repair | None = None
@@ -132,7 +135,7 @@ class ApartmentParse(BaseParser):
                 raise ParserError(f'Неизвестный тип строения: "{building_material_text}"')
 
     def __extract_furniture(self):
-        furniture_match = re.search(r"Меблирована:\s*([А-Я]{1,}[^А-Я]+)", self.html)
+        furniture_match = re.search(r"Меблирована:\s*([А-Яа-я]+)", self.html)
 
         if not furniture_match:
             logger.warning('Не удалось найти элемент "Меблирована"')
@@ -148,10 +151,11 @@ class ApartmentParse(BaseParser):
         total_price_match = re.search(r"([\d\s]+)\sу\.е\.", html_normalized)
 
         if total_price_match:
-            total_price_str = total_price_match.group(1)
-            total_price_str = re.search(r"\d+", total_price_str).group(0).replace(" ", "")
+            # Разряды разделены пробелами: "293 000" -> "293000"
+            total_price_str = "".join(total_price_match.group(1).split())
             try:
                 self.total_price = int(total_price_str)
+                self.currency = Currency.USD
                 return
             except Exception as e:
                 raise ParserError(f"Не удалось преобразовать цену в int: {total_price_str}") from e
@@ -163,9 +167,12 @@ class ApartmentParse(BaseParser):
             try:
                 price = int(total_price_str)
                 if "сум" in total_price_match.group(0):
-                    self.total_price = await convert_uzs_to_usd(price)
+                    with self.waiting("currency"):
+                        self.total_price = await convert_uzs_to_usd(price)
+                    self.currency = Currency.UZS
                 else:
                     self.total_price = price
+                    self.currency = Currency.USD
                 return
             except Exception as e:
                 raise ParserError(f"Не удалось преобразовать цену в int: {total_price_str}") from e
@@ -187,101 +194,6 @@ class ApartmentParse(BaseParser):
         self.__extract_furniture()
         await self.__extract_total_price()
 
-    async def send_db(self):
-        """Сохраняет спарсенные данные в базу данных"""
-        from sqlalchemy import select
-        from ..models.db_helper import db_helper
-        from ..models.post import Post, Source, TypeOfService
-        from ..models.post_sale_apartment import PostSaleApartment
-        from ..models.post_rent_apartment import PostRentApartment
-        from ..models.organization import Organization, Platform
-
-        session = db_helper.get_scope_session()
-
-        try:
-            # 1. Проверяем/создаем организацию
-            stmt = select(Organization).where(
-                and_(Organization.url == self.organization_url, Organization.platform == Platform.OLX)
-            )
-            result = await session.execute(stmt)
-            organization = result.scalar_one_or_none()
-
-            if not organization:
-                organization = Organization(
-                    url=self.organization_url,
-                    platform=Platform.OLX,
-                    is_broker=self.is_broker if hasattr(self, "is_broker") else False,
-                )
-                session.add(organization)
-                await session.flush()  # Получаем ID организации
-                logger.info(f"Создана новая организация: {organization.url}")
-
-            # 2. Проверяем существование поста по external_id
-            stmt = select(Post).where(Post.external_id == self.external_id, Post.source == Source.OLX)
-            result = await session.execute(stmt)
-            existing_post = result.scalar_one_or_none()
-
-            if existing_post:
-                logger.info(f"Пост {self.external_id} уже существует в БД, пропускаем")
-                await session.remove()
-                return
-
-            # 3. Создаем новый пост
-            new_post = Post(
-                type_of_property=self.type_of_property,
-                type_of_service=self.type_of_service,
-                url=self.url,
-                title=self.title,
-                description=self.description,
-                source=Source.OLX,
-                external_id=self.external_id,
-                phone_number=getattr(self, "phone_number", None),
-                polygon_id=self.polygon_id,
-                organization_id=organization.id,
-                is_broker=getattr(self, "is_broker", False),
-            )
-            session.add(new_post)
-            await session.flush()  # Получаем ID поста
-
-            # 4. Создаем запись в таблице квартир (sale или rent)
-            if self.type_of_service == TypeOfService.SALE.value:
-                apartment_details = PostSaleApartment(
-                    post_id=new_post.id,
-                    rooms=self.rooms,
-                    floor=self.floor,
-                    total_floor=self.total_floor,
-                    total_area_sqm=self.total_area_sqm,
-                    total_price=self.total_price,
-                    is_new_building=self.is_new_building,
-                    has_furniture=self.has_furniture,
-                    repair=self.repair,
-                    building_material=self.building_material,
-                )
-            else:  # RENT
-                apartment_details = PostRentApartment(
-                    post_id=new_post.id,
-                    rooms=self.rooms,
-                    floor=self.floor,
-                    total_floor=self.total_floor,
-                    total_area_sqm=self.total_area_sqm,
-                    total_price=self.total_price,
-                    is_new_building=self.is_new_building,
-                    has_furniture=self.has_furniture,
-                    repair=self.repair,
-                    building_material=self.building_material,
-                )
-
-            session.add(apartment_details)
-            await session.commit()
-            logger.success(f"Квартира {self.external_id} успешно сохранена в БД")
-
-        except Exception as e:
-            await session.rollback()
-            logger.error(f": Ошибка при сохранении квартиры в БД: {e}")
-            raise
-        finally:
-            await session.remove()
-
 
 async def main():
     """
@@ -302,7 +214,7 @@ async def main():
                 session=session,
             ).execute()
 
-            for row in result.__dict__:
+            for row in result.__dataclass_fields__:
                 print(row, getattr(result, row))
 
 
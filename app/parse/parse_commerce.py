@@ -4,7 +4,6 @@ import re
 import aiohttp
 from bs4 import BeautifulSoup
 from loguru import logger
-from sqlalchemy import and_
 
 from ..exception import ParserError
 from ..models.post_sale_apartment import Repair
@@ -12,6 +11,8 @@ from ..models.post_sale_commerce import Purpose
 from ..schemas.post_commerce import PostCommerce as PostCommerceSchemas
 from ..core.config import load_config
 from ..models.post import TypeOfProperty
+from ..models.post_price_history import Currency
+from ..schemas.records import CommerceRecord
 from .parse_post import BaseParser
 from ..misc.convert_to_usd import convert_uzs_to_usd
 
@@ -21,15 +22,17 @@ config = load_config()
 
 class CommerceParse(BaseParser):
     type_of_property = TypeOfProperty.COMMERCE.value
+    record_type = CommerceRecord
 
-    def __init__(self, url: str, soup: BeautifulSoup, session: aiohttp.ClientSession):
-        super().__init__(url, soup, session)
+    def __init__(self, url: str, soup: BeautifulSoup, session: aiohttp.ClientSession, html: str | None = None):
+        super().__init__(url, soup, session, html)
 
         self.floor: int | None = None
         self.total_floor: int | None = None
         self.total_area_sqm: int | None = None
         self.land_area_sqm: int | None = None
         self.total_price: int | None = None
+        self.currency: Currency | None = None
         self.repair: Repair | None = None
         self.purpose: Purpose | None = None
 
@@ -155,6 +158,7 @@ class CommerceParse(BaseParser):
             total_price_str = total_price_match.group(1).replace(" ", "")
             try:
                 self.total_price = int(total_price_str)
+                self.currency = Currency.USD
                 return
             except Exception as e:
                 raise ParserError(f"Не удалось преобразовать цену в int: {total_price_str}") from e
@@ -167,9 +171,12 @@ class CommerceParse(BaseParser):
             try:
                 price = int(total_price_str)
                 if "сум" in total_price_match.group(0):
-                    self.total_price = await convert_uzs_to_usd(price)
+                    with self.waiting("currency"):
+                        self.total_price = await convert_uzs_to_usd(price)
+                    self.currency = Currency.UZS
                 else:
                     self.total_price = price
+                    self.currency = Currency.USD
                 return
             except Exception as e:
                 raise ParserError(f"Не удалось преобразовать цену в int: {total_price_str}") from e
@@ -189,101 +196,6 @@ class CommerceParse(BaseParser):
         self.__extract_purpose()
         await self.__extract_total_price()
 
-    async def send_db(self):
-        """Сохраняет спарсенные данные в базу данных"""
-        from sqlalchemy import select
-        from ..models.db_helper import db_helper
-        from ..models.post import Post, Source, TypeOfService
-        from ..models.post_sale_commerce import PostSaleCommerce
-        from ..models.post_rent_commerce import PostRentCommerce
-        from ..models.organization import Organization, Platform
-
-        session = db_helper.get_scope_session()
-
-        try:
-            # 1. Проверяем/создаем организацию
-            stmt = select(Organization).where(
-                and_(Organization.url == self.organization_url, Organization.platform == Platform.OLX)
-            )
-            result = await session.execute(stmt)
-            organization = result.scalar_one_or_none()
-
-            if not organization:
-                organization = Organization(
-                    url=self.organization_url,
-                    platform=Platform.OLX,
-                    is_broker=getattr(self, "is_broker", False),
-                )
-                session.add(organization)
-                await session.flush()
-                logger.info(f"Создана новая организация: {organization.url}")
-
-            # 2. Проверяем существование поста по external_id
-            stmt = select(Post).where(Post.external_id == self.external_id, Post.source == Source.OLX)
-            result = await session.execute(stmt)
-            existing_post = result.scalar_one_or_none()
-
-            if existing_post:
-                logger.info(f"Пост {self.external_id} уже существует в БД, пропускаем")
-                await session.remove()
-                return
-
-            # 3. Создаем новый пост
-            new_post = Post(
-                type_of_property=self.type_of_property,
-                type_of_service=self.type_of_service,
-                url=self.url,
-                title=self.title,
-                description=self.description,
-                source=Source.OLX,
-                external_id=self.external_id,
-                phone_number=getattr(self, "phone_number", None),
-                polygon_id=self.polygon_id,
-                organization_id=organization.id,
-                is_broker=getattr(self, "is_broker", False),
-            )
-            session.add(new_post)
-            await session.flush()
-
-            # 4. Создаем запись в таблице коммерческой недвижимости (sale или rent)
-            if self.type_of_service == TypeOfService.SALE.value:
-                commerce_details = PostSaleCommerce(
-                    post_id=new_post.id,
-                    rooms=getattr(self, "rooms", None),
-                    floor=self.floor,
-                    total_floor=self.total_floor,
-                    total_area_sqm=self.total_area_sqm,
-                    land_area_sqm=self.land_area_sqm,
-                    total_price=self.total_price,
-                    has_furniture=getattr(self, "has_furniture", None),
-                    repair=self.repair,
-                    purpose=self.purpose,
-                )
-            else:  # RENT
-                commerce_details = PostRentCommerce(
-                    post_id=new_post.id,
-                    rooms=getattr(self, "rooms", None),
-                    floor=self.floor,
-                    total_floor=self.total_floor,
-                    total_area_sqm=self.total_area_sqm,
-                    land_area_sqm=self.land_area_sqm,
-                    total_price=self.total_price,
-                    has_furniture=getattr(self, "has_furniture", None),
-                    repair=self.repair,
-                    purpose=self.purpose,
-                )
-
-            session.add(commerce_details)
-            await session.commit()
-            logger.success(f"Коммерческая недвижимость {self.external_id} успешно сохранена в БД")
-
-        except Exception as e:
-            await session.rollback()
-            logger.error(f"Ошибка при сохранении коммерческой недвижимости в БД: {e}")
-            raise
-        finally:
-            await session.remove()
-
 
 async def main():
     """
@@ -308,7 +220,7 @@ async def main():
                 session=session,
             ).execute()
 
-            for row in result.__dict__:
+            for row in result.__dataclass_fields__:
                 print(row, getattr(result, row))
 
 
@@ -4,14 +4,15 @@ import re
 import aiohttp
 from bs4 import BeautifulSoup
 from loguru import logger
-from sqlalchemy import and_
 
 from ..exception import ParserError
 from ..schemas.post_house import PostHouse as PostHouseSchemas
 from ..core.config import load_config
 from ..models.post import TypeOfProperty
+from ..models.post_price_history import Currency
 from ..models.post_sale_apartment import Repair, BuildingMaterial
 from ..models.post_sale_house import HouseType
+from ..schemas.records import HouseRecord
 from .parse_post import BaseParser
 from ..misc.convert_to_usd import convert_uzs_to_usd
 
@@ -21,15 +22,17 @@ config = load_config()
 
 class HouseParse(BaseParser):
     type_of_property = TypeOfProperty.HOUSE.value
+    record_type = HouseRecord
 
-    def __init__(self, url: str, soup: BeautifulSoup, session: aiohttp.ClientSession):
-        super().__init__(url, soup, session)
+    def __init__(self, url: str, soup: BeautifulSoup, session: aiohttp.ClientSession, html: str | None = None):
+        super().__init__(url, soup, session, html)
 
         self.rooms: int | None = None
         self.total_floor: int | None = None
         self.total_area_sqm: int | None = None
         self.land_area_sqm: int | None = None
         self.total_price: int | None = None
+        self.currency: Currency | None = None
         self.has_furniture: bool = False
         self.repair: Repair | None = None
         self.building_material: BuildingMaterial | None = None
@@ -198,7 +201,7 @@ class HouseParse(BaseParser):
                 raise ParserError(f'Неизвестный тип дома: "{house_type_text}"')
 
     def __extract_furniture(self):
-        furniture_match = re.search(r"Меблирована:\s*([А-Я]{1,}[^А-Я]+)", self.html)
+        furniture_match = re.search(r"Меблирована:\s*([А-Яа-я]+)", self.html)
 
         if not furniture_match:
             logger.warning('Не найден элемент "Меблирована"')
@@ -216,6 +219,7 @@ class HouseParse(BaseParser):
             total_price_str = total_price_match.group(1).replace(" ", "")
             try:
                 self.total_price = int(total_price_str)
+                self.currency = Currency.USD
                 self.__calculate_price_per_square()
                 return
             except Exception as e:
@@ -228,9 +232,12 @@ class HouseParse(BaseParser):
             try:
                 price = int(total_price_str)
                 if "сум" in total_price_match.group(0):
-                    self.total_price = await convert_uzs_to_usd(price)
+                    with self.waiting("currency"):
+                        self.total_price = await convert_uzs_to_usd(price)
+                    self.currency = Currency.UZS
                 else:
                     self.total_price = price
+                    self.currency = Currency.USD
                 self.__calculate_price_per_square()
                 return
             except Exception as e:
@@ -265,101 +272,6 @@ class HouseParse(BaseParser):
         self.__extract_furniture()
         await self.__extract_total_price()
 
-    async def send_db(self):
-        """Сохраняет спарсенные данные в базу данных"""
-        from sqlalchemy import select
-        from ..models.db_helper import db_helper
-        from ..models.post import Post, Source, TypeOfService
-        from ..models.post_sale_house import PostSaleHouse
-        from ..models.post_rent_house import PostRentHouse
-        from ..models.organization import Organization, Platform
-
-        session = db_helper.get_scope_session()
-
-        try:
-            # 1. Проверяем/создаем организацию
-            stmt = select(Organization).where(
-                and_(Organization.url == self.organization_url, Organization.platform == Platform.OLX)
-            )
-            result = await session.execute(stmt)
-            organization = result.scalar_one_or_none()
-
-            if not organization:
-                organization = Organization(
-                    url=self.organization_url,
-                    platform=Platform.OLX,
-                    is_broker=getattr(self, "is_broker", False),
-                )
-                session.add(organization)
-                await session.flush()
-                logger.info(f"Создана новая организация: {organization.url}")
-
-            # 2. Проверяем существование поста по external_id
-            stmt = select(Post).where(Post.external_id == self.external_id, Post.source == Source.OLX)
-            result = await session.execute(stmt)
-            existing_post = result.scalar_one_or_none()
-
-            if existing_post:
-                logger.info(f"Пост {self.external_id} уже существует в БД, пропускаем")
-                await session.remove()
-                return
-
-            # 3. Создаем новый пост
-            new_post = Post(
-                type_of_property=self.type_of_property,
-                type_of_service=self.type_of_service,
-                url=self.url,
-                title=self.title,
-                description=self.description,
-                source=Source.OLX,
-                external_id=self.external_id,
-                phone_number=getattr(self, "phone_number", None),
-                polygon_id=self.polygon_id,
-                organization_id=organization.id,
-                is_broker=getattr(self, "is_broker", False),
-            )
-            session.add(new_post)
-            await session.flush()
-
-            # 4. Создаем запись в таблице домов (sale или rent)
-            if self.type_of_service == TypeOfService.SALE.value:
-                house_details = PostSaleHouse(
-                    post_id=new_post.id,
-                    rooms=self.rooms,
-                    total_floor=self.total_floor,
-                    total_area_sqm=self.total_area_sqm,
-                    land_area_sqm=self.land_area_sqm,
-                    total_price=self.total_price,
-                    has_furniture=self.has_furniture,
-                    building_material=self.building_material,
-                    repair=self.repair,
-                    house_type=self.house_type,
-                )
-            else:  # RENT
-                house_details = PostRentHouse(
-                    post_id=new_post.id,
-                    rooms=self.rooms,
-                    total_floor=self.total_floor,
-                    total_area_sqm=self.total_area_sqm,
-                    land_area_sqm=self.land_area_sqm,
-                    total_price=self.total_price,
-                    has_furniture=self.has_furniture,
-                    building_material=self.building_material,
-                    repair=self.repair,
-                    house_type=self.house_type,
-                )
-
-            session.add(house_details)
-            await session.commit()
-            logger.success(f"Дом {self.external_id} успешно сохранен в БД")
-
-        except Exception as e:
-            await session.rollback()
-            logger.error(f"Ошибка при сохранении дома в БД: {e}")
-            raise
-        finally:
-            await session.remove()
-
 
 async def main():
     """
@@ -384,7 +296,7 @@ async def main():
                 session=session,
             ).execute()
 
-            for row in result.__dict__:
+            for row in result.__dataclass_fields__:
                 print(row, getattr(result, row))
 
 
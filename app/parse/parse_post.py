@@ -1,24 +1,74 @@
 import asyncio
+import functools
+import inspect
 import re
+import time
+from contextlib import contextmanager
 import aiohttp
 from bs4 import BeautifulSoup
 from fastapi import HTTPException
 from loguru import logger
+from sqlalchemy import select
 
 from ..exception import ParserError
 from ..misc.clean_text import clean_text
-from ..models.post import TypeOfProperty, TypeOfService
+from ..misc.fingerprint import content_fingerprint
+from ..misc.latency import latency
+from ..misc.metrics import extractor_seconds
+from ..models.db_helper import db_helper
+from ..models.post import Post, Source, TypeOfProperty, TypeOfService
+from ..schemas.records import PostRecord, UnchangedPost
 from ..core.config import load_config
 
 config = load_config()
 
 
+def _timed(parser_name: str, stage: str, method):
+    """
+    Оборачивает метод парсера замером времени в self.timings и метрику olx_extractor_seconds.
+    Ожидание сети и БД внутри метода (self.waiting) из замера вычитается
+    """
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            waited = self.waited
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self.record_timing(stage, time.perf_counter() - started - (self.waited - waited), parser_name)
+
+    else:
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.record_timing(stage, time.perf_counter() - started, parser_name)
+
+    return wrapper
+
+
+def _instrument(cls):
+    """Оборачивает замером все приватные методы класса (__extract_*, __get_polygon, ...)"""
+    prefix = f"_{cls.__name__}__"
+    for name, method in list(vars(cls).items()):
+        if name.startswith(prefix) and inspect.isfunction(method):
+            setattr(cls, name, _timed(cls.__name__, name.removeprefix(prefix), method))
+
+
 class BaseParser:
     registry = {}
+    # Тип записи, которую возвращает execute() для этого парсера
+    record_type: type[PostRecord] = PostRecord
 
     def __init_subclass__(cls, **kwargs):
-        """Регистрирует дочерние парсеры по типу недвижимости"""
+        """Регистрирует дочерние парсеры по типу недвижимости и добавляет замеры методов"""
         super().__init_subclass__(**kwargs)
+        _instrument(cls)
         if hasattr(cls, "type_of_property"):
             BaseParser.registry[cls.type_of_property] = cls
             logger.info(f"Registered: {cls.type_of_property} -> {cls.__name__}")
@@ -27,12 +77,23 @@ class BaseParser:
         self,
         url: str,
         soup: BeautifulSoup,
-        session: aiohttp.ClientSession,
+        session: aiohttp.ClientSession | None,
+        html: str | None = None,
     ):
         self.url = url
         self.soup = soup
         self.session = session
-        self.html = str(soup)
+        # Время по этапам парсинга этой страницы, секунды
+        self.timings: dict[str, float] = {}
+        # Ожидание сети и БД (полигон, курс валют, поиск отпечатка), секунды; в timings не входит
+        self.waits: dict[str, float] = {}
+        self.waited = 0.0
+
+        if html is None:
+            started = time.perf_counter()
+            html = str(soup)
+            self.record_timing("str_soup", time.perf_counter() - started)
+        self.html = html
 
         self.type_of_property = None
         self.type_of_service = None
@@ -41,6 +102,24 @@ class BaseParser:
         self.title = None
         self.description = None
         self.polygon_id = None
+        self.content_hash = None
+        # ID сохранённого поста, если содержимое не изменилось с прошлой загрузки
+        self.unchanged_post_id = None
+
+    def record_timing(self, stage: str, seconds: float, parser_name: str | None = None):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        extractor_seconds.observe(seconds, parser=parser_name or type(self).__name__, stage=stage)
+
+    @contextmanager
+    def waiting(self, stage: str):
+        """Замеряет ожидание сети или БД в self.waits; этапы парсера это время не учитывают"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.waits[stage] = self.waits.get(stage, 0.0) + seconds
+            self.waited += seconds
 
     def __extract_properties(self):
         breadcrumbs = self.soup.find("ol", {"data-testid": "breadcrumbs"})
@@ -113,24 +192,61 @@ class BaseParser:
         external_match = re.search(r"(\d+)", external_id_element.text)
         self.external_id = external_match.group(0)
 
+    async def __find_unchanged(self):
+        """Ищет сохранённый пост с тем же отпечатком содержимого"""
+        if self.session is None or self.content_hash is None:
+            # Офлайн-режим (replay архива) или страница без отпечатка: в БД не ходим
+            return
+
+        session = db_helper.get_scope_session()
+        try:
+            stmt = select(Post.id, Post.content_hash).where(
+                Post.external_id == self.external_id, Post.source == Source.OLX
+            )
+            with self.waiting("find_unchanged"):
+                existing = (await session.execute(stmt)).first()
+        except Exception as e:
+            # Без БД пост разбирается полностью: сохранение само решит, новый он или уже существует
+            logger.warning(f"Не удалось проверить отпечаток поста {self.external_id}: {e}")
+            return
+        finally:
+            await session.remove()
+
+        if existing is not None and existing.content_hash == self.content_hash:
+            self.unchanged_post_id = existing.id
+
     async def __get_polygon(self):
+        if self.session is None:
+            # Офлайн-режим (replay архива): полигональный сервис не вызываем
+            self.polygon_id = None
+            self.polygon_keyword = None
+            return
+
         url_polygon = config.parser.polygon_service_url
+        started = time.perf_counter()
         text = clean_text(f"{self.title} - {self.description}")
+        self.record_timing("clean_text", time.perf_counter() - started, "BaseParser")
         data = {
             "text": text,
         }
+        timeout = aiohttp.ClientTimeout(total=latency.timeout("polygon"))
+        started = time.monotonic()
         try:
-            async with self.session.post(url_polygon, json=data, timeout=config.parser.request_timeout) as response:
-                if response.status != 200:
-                    logger.error(f"Ошибка polygon сервиса: статус {response.status}")
-                    raise HTTPException(status_code=response.status, detail=f"Polygon error: {data}")
-
-                result = await response.json()
-                self.polygon_id = result.get("polygon_id")
-                self.polygon_keyword = result.get("key")
-                logger.debug(f"Получен polygon_id: {self.polygon_id}, keyword: {self.polygon_keyword}")
+            with self.waiting("polygon"):
+                async with self.session.post(url_polygon, json=data, timeout=timeout) as response:
+                    if response.status != 200:
+                        logger.error(f"Ошибка polygon сервиса: статус {response.status}")
+                        raise HTTPException(status_code=response.status, detail=f"Polygon error: {data}")
+                    result = await response.json()
+            # Задержка учитывается только для успешных ответов
+            latency.record("polygon", time.monotonic() - started)
+            self.polygon_id = result.get("polygon_id")
+            self.polygon_keyword = result.get("key")
+            logger.debug(f"Получен polygon_id: {self.polygon_id}, keyword: {self.polygon_keyword}")
         except asyncio.TimeoutError:
             logger.warning(f"Таймаут при обращении к polygon сервису: {url_polygon}")
+            # Таймаут - замер не меньше таймаута, иначе на замедлившемся сервисе таймаут только уменьшается
+            latency.record("polygon", timeout.total)
             self.polygon_id = None
             self.polygon_keyword = None
 
@@ -141,21 +257,40 @@ class BaseParser:
         self.__extract_title()
         self.__extract_description()
         self.__extract_external_id()
-        await self.__get_polygon()
+        started = time.perf_counter()
+        self.content_hash = content_fingerprint(self.soup, self.title, self.description)
+        self.record_timing("content_fingerprint", time.perf_counter() - started, "BaseParser")
+        await self.__find_unchanged()
+        if self.unchanged_post_id is None:
+            await self.__get_polygon()
+
+    def to_record(self) -> PostRecord:
+        """Запись record_type из одноимённых атрибутов парсера; отсутствующие получают значения по умолчанию"""
+        return self.record_type(
+            **{name: getattr(self, name) for name in self.record_type.__dataclass_fields__ if hasattr(self, name)}
+        )
 
-    async def execute(self):
+    async def execute(self) -> PostRecord | UnchangedPost:
         """
-        Главный метод: определяет тип недвижимости и вызывает нужный парсер.
+        Главный метод: определяет тип недвижимости, вызывает нужный парсер и возвращает
+        запись для сохранения. После возврата DOM парсеру больше не нужен.
         Используется только для BaseParser, дочерние классы переопределяют этот метод.
         """
         # Сначала парсим базовые данные, чтобы определить type_of_property
         await self.parse()
 
+        if self.unchanged_post_id is not None:
+            # Содержимое не изменилось: полигон, курс и детальный парсинг не нужны
+            logger.info(f"Пост {self.external_id} не изменился, обновляем только updated_at")
+            return UnchangedPost(
+                post_id=self.unchanged_post_id, external_id=self.external_id, timings=self.timings, waits=self.waits
+            )
+
         # Проверяем, есть ли специализированный парсер для этого типа
         if self.type_of_property in self.registry:
-            # Создаем экземпляр специализированного парсера
+            # Создаем экземпляр специализированного парсера; HTML уже получен из DOM, повторно не сериализуем
             specialized_parser = self.registry[self.type_of_property](
-                url=self.url, soup=self.soup, session=self.session
+                url=self.url, soup=self.soup, session=self.session, html=self.html
             )
             # Копируем уже спарсенные базовые данные
             specialized_parser.type_of_property = self.type_of_property
@@ -166,8 +301,17 @@ class BaseParser:
             specialized_parser.description = self.description
             specialized_parser.polygon_id = self.polygon_id
             specialized_parser.polygon_keyword = getattr(self, "polygon_keyword", None)
+            specialized_parser.content_hash = self.content_hash
+            for stage, seconds in self.timings.items():
+                specialized_parser.timings[stage] = specialized_parser.timings.get(stage, 0.0) + seconds
+            for stage, seconds in self.waits.items():
+                specialized_parser.waits[stage] = specialized_parser.waits.get(stage, 0.0) + seconds
+            specialized_parser.waited += self.waited
 
             await specialized_parser.execute()
-            return specialized_parser
+            return specialized_parser.to_record()
         else:
             raise ValueError(f"Нет парсера для типа недвижимости: {self.type_of_property}")
+
+
+_instrument(BaseParser)
@@ -0,0 +1,176 @@
+import enum
+import uuid
+
+from loguru import logger
+from sqlalchemy import Table, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from ..models.db_helper import db_helper
+from ..models.organization import Organization, Platform
+from ..models.post import Post, Source, Status, TypeOfProperty, TypeOfService
+from ..models.post_rent_apartment import PostRentApartment
+from ..models.post_rent_commerce import PostRentCommerce
+from ..models.post_rent_house import PostRentHouse
+from ..models.post_sale_apartment import PostSaleApartment
+from ..models.post_sale_commerce import PostSaleCommerce
+from ..models.post_sale_house import PostSaleHouse
+from ..schemas.records import PostRecord
+from .posts import refresh_existing
+from .price_history import price_history
+
+# Таблица деталей для каждого сочетания типа недвижимости и услуги
+DETAIL_TABLES: dict[tuple[TypeOfProperty, TypeOfService], Table] = {
+    (TypeOfProperty.APARTMENT, TypeOfService.SALE): PostSaleApartment.__table__,
+    (TypeOfProperty.APARTMENT, TypeOfService.RENT): PostRentApartment.__table__,
+    (TypeOfProperty.HOUSE, TypeOfService.SALE): PostSaleHouse.__table__,
+    (TypeOfProperty.HOUSE, TypeOfService.RENT): PostRentHouse.__table__,
+    (TypeOfProperty.COMMERCE, TypeOfService.SALE): PostSaleCommerce.__table__,
+    (TypeOfProperty.COMMERCE, TypeOfService.RENT): PostRentCommerce.__table__,
+}
+
+# Поля записи, которые нужны для строки posts и истории цен (кроме колонок таблицы деталей)
+RECORD_FIELDS = (
+    "type_of_property",
+    "type_of_service",
+    "url",
+    "title",
+    "description",
+    "external_id",
+    "phone_number",
+    "polygon_id",
+    "organization_url",
+    "is_broker",
+    "content_hash",
+    "currency",
+)
+
+# Колонки таблиц деталей, которые меняются вместе с ценой: при перепроверке обновляются те, что есть
+# в таблице (price_per_square есть только у домов и считается парсером от total_price)
+PRICE_COLUMNS = ("total_price", "price_per_square")
+
+posts = Post.__table__
+organizations = Organization.__table__
+
+
+def snapshot(record: PostRecord) -> dict:
+    """Поля записи, нужные для сохранения, в виде JSON-совместимого словаря (для спула)"""
+    names = RECORD_FIELDS + tuple(column.name for column in detail_table(record).columns if column.name != "post_id")
+    values = {}
+    for name in names:
+        value = getattr(record, name, None)
+        values[name] = value.value if isinstance(value, enum.Enum) else value
+    return values
+
+
+def detail_table(record: PostRecord) -> Table:
+    return DETAIL_TABLES[(TypeOfProperty(record.type_of_property), TypeOfService(record.type_of_service))]
+
+
+def post_values(record: PostRecord, post_id: str, organization_id: int) -> dict:
+    """Строка posts для нового поста"""
+    return {
+        "id": post_id,
+        "type_of_property": record.type_of_property,
+        "type_of_service": record.type_of_service,
+        "url": record.url,
+        "title": record.title,
+        "description": record.description,
+        "source": Source.OLX,
+        "status": Status.ACTIVE,
+        "external_id": record.external_id,
+        "phone_number": getattr(record, "phone_number", None),
+        "polygon_id": record.polygon_id,
+        "organization_id": organization_id,
+        "is_broker": getattr(record, "is_broker", False),
+        "content_hash": record.content_hash,
+        "added_at": func.current_timestamp(),
+        "updated_at": func.current_timestamp(),
+    }
+
+
+def price_values(table: Table, record: PostRecord) -> dict:
+    """Цена и зависящие от неё колонки таблицы деталей для обновления при перепроверке"""
+    return {name: getattr(record, name, None) for name in PRICE_COLUMNS if name in table.c}
+
+
+def detail_values(table: Table, record: PostRecord, post_id: str) -> dict:
+    """Строка таблицы деталей: колонки заполняются одноимёнными полями записи, отсутствующие - NULL"""
+    values = {column.name: getattr(record, column.name, None) for column in table.columns}
+    values["post_id"] = post_id
+    return values
+
+
+async def organization_id(session, record: PostRecord) -> int:
+    """
+    ID организации объявления; создаёт организацию, если её ещё нет. Если ту же организацию
+    одновременно вставил другой обработчик, вставка нарушает uq_organizations_platform_url
+    и откатывается до savepoint, а возвращается ID уже вставленной строки
+    """
+    query = select(organizations.c.id).where(
+        organizations.c.url == record.organization_url, organizations.c.platform == Platform.OLX
+    )
+    found = await session.scalar(query)
+    if found is not None:
+        return found
+
+    try:
+        async with session.begin_nested():
+            result = await session.execute(
+                insert(organizations).values(
+                    url=record.organization_url, platform=Platform.OLX, is_broker=getattr(record, "is_broker", False)
+                )
+            )
+    except IntegrityError:
+        # Блокирующее чтение видит строку, закоммиченную после начала транзакции (REPEATABLE READ в MySQL)
+        found = await session.scalar(query.with_for_update(read=True))
+        if found is None:
+            raise
+        return found
+    logger.info(f"Создана новая организация: {record.organization_url}")
+    return result.inserted_primary_key[0]
+
+
+async def write(session, record: PostRecord) -> tuple[str, bool]:
+    """
+    Сохраняет объявление в открытой сессии, коммит остаётся за вызывающим кодом.
+    Возвращает (ID поста, нужно ли записать цену в историю)
+    """
+    table = detail_table(record)
+    post_id = await session.scalar(
+        select(posts.c.id).where(posts.c.external_id == record.external_id, posts.c.source == Source.OLX)
+    )
+    if post_id is not None:
+        # Повторная загрузка (перепроверка): обновляем цену и updated_at
+        price_changed = await refresh_existing(
+            session, post_id, table, price_values(table, record), record.content_hash
+        )
+        logger.info(f"Пост {record.external_id} уже существует в БД, обновлён")
+        return post_id, price_changed
+
+    post_id = uuid.uuid4().hex
+    owner_id = await organization_id(session, record)
+    await session.execute(insert(posts).values(post_values(record, post_id, owner_id)))
+    await session.execute(insert(table).values(detail_values(table, record, post_id)))
+    logger.success(f"Пост {record.external_id} ({record.type_of_property}, {record.type_of_service}) сохранён в БД")
+    return post_id, True
+
+
+async def save(record: PostRecord):
+    """
+    Сохраняет спарсенное объявление: организацию, пост и строку таблицы деталей, выбранной
+    по (type_of_property, type_of_service). Уже сохранённый пост обновляется (refresh_existing).
+    Изменения цены попадают в историю цен после коммита
+    """
+    session = db_helper.get_scope_session()
+    try:
+        post_id, price_changed = await write(session, record)
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при сохранении поста {record.external_id} в БД: {e}")
+        raise
+    finally:
+        await session.remove()
+
+    if price_changed:
+        price_history.record(post_id, record.total_price, record.currency)
@@ -0,0 +1,65 @@
+from loguru import logger
+from sqlalchemy import Table, Update, func, select, update
+
+from ..models.db_helper import db_helper
+from ..models.post import Post, Status
+
+
+def set_status(post_id: str, status: Status) -> Update:
+    """UPDATE статуса поста с отметкой updated_at"""
+    return update(Post).where(Post.id == post_id).values(status=status, updated_at=func.current_timestamp())
+
+
+async def mark_removed(post_id: str):
+    """Помечает пост снятым с публикации"""
+    session = db_helper.get_scope_session()
+    try:
+        await session.execute(set_status(post_id, Status.REMOVED))
+        await session.commit()
+        logger.info(f"Пост {post_id} помечен как снятый с публикации")
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при обновлении статуса поста {post_id}: {e}")
+        raise
+    finally:
+        await session.remove()
+
+
+async def touch(post_id: str):
+    """Обновляет updated_at поста, содержимое которого не изменилось"""
+    session = db_helper.get_scope_session()
+    try:
+        await session.execute(set_status(post_id, Status.ACTIVE))
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при обновлении updated_at поста {post_id}: {e}")
+        raise
+    finally:
+        await session.remove()
+
+
+async def refresh_existing(
+    session, post_id: str, detail_table: Table, prices: dict, content_hash: str | None = None
+) -> bool:
+    """
+    Обновляет уже сохранённый пост при повторной загрузке: если изменилась цена (prices["total_price"]),
+    записывает в таблицу деталей все колонки prices - цену и зависящие от неё значения.
+    Также обновляет отпечаток содержимого и updated_at. Коммит остаётся за вызывающим кодом.
+    Возвращает True, если цена изменилась.
+    """
+    price_changed = False
+    total_price = prices.get("total_price")
+    detail = (
+        await session.execute(select(detail_table.c.total_price).where(detail_table.c.post_id == post_id))
+    ).first()
+    if detail is not None and total_price is not None and detail.total_price != total_price:
+        logger.info(f"Цена поста {post_id} изменилась: {detail.total_price} -> {total_price}")
+        await session.execute(update(detail_table).where(detail_table.c.post_id == post_id).values(**prices))
+        price_changed = True
+
+    values = {"status": Status.ACTIVE, "updated_at": func.current_timestamp()}
+    if content_hash is not None:
+        values["content_hash"] = content_hash
+    await session.execute(update(Post).where(Post.id == post_id).values(**values))
+    return price_changed
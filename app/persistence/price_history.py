@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, UTC
+
+from loguru import logger
+from sqlalchemy import insert
+
+from ..core.config import load_config
+from ..models.db_helper import db_helper
+from ..models.post_price_history import Currency, PostPriceHistory
+
+config = load_config()
+
+
+def history_row(
+    post_id: str, price_usd: int | None, currency: Currency | None, observed_at: datetime | None = None
+) -> dict | None:
+    """Строка post_price_history для наблюдения цены (None, если цены нет)"""
+    if price_usd is None:
+        return None
+    return {
+        "post_id": post_id,
+        "observed_at": observed_at or datetime.now(UTC),
+        "price_usd": price_usd,
+        "original_currency": currency or Currency.USD,
+    }
+
+
+class PriceHistoryWriter:
+    """
+    Буфер истории цен: записи копятся в памяти и вставляются одним запросом,
+    когда набирается batch записей или проходит interval секунд.
+    Если вставка не удалась, записи возвращаются в буфер (не больше limit) и
+    повторяются следующей попыткой
+    """
+
+    def __init__(self, batch: int = 200, interval: float = 5.0, limit: int = 50_000):
+        self.batch = batch
+        self.interval = interval
+        self.limit = limit
+        self._rows: list[dict] = []
+        self._full = asyncio.Event()
+
+    def record(self, post_id: str, price_usd: int | None, currency: Currency | None):
+        """Добавляет наблюдение цены; вызывается только после коммита поста"""
+        row = history_row(post_id, price_usd, currency)
+        if row is None:
+            return
+        self._rows.append(row)
+        if len(self._rows) >= self.batch:
+            self._full.set()
+
+    def _restore(self, rows: list[dict]):
+        """Возвращает невставленные записи в начало буфера; сверх limit отбрасываются самые старые"""
+        self._rows = rows + self._rows
+        dropped = len(self._rows) - self.limit
+        if dropped > 0:
+            del self._rows[:dropped]
+            logger.error(f"Буфер истории цен переполнен, отброшено {dropped} старых записей")
+
+    async def flush(self) -> bool:
+        """Вставляет накопленные записи; False, если вставка не удалась и записи остались в буфере"""
+        rows, self._rows = self._rows, []
+        self._full.clear()
+        if not rows:
+            return True
+
+        session = db_helper.get_scope_session()
+        try:
+            await session.execute(insert(PostPriceHistory), rows)
+            await session.commit()
+            logger.debug(f"Записано {len(rows)} изменений цен")
+            return True
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Не удалось записать историю цен ({len(rows)} записей), повторим позже: {e}")
+            self._restore(rows)
+            return False
+        finally:
+            await session.remove()
+
+    async def run(self):
+        """Фоновая запись буфера"""
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                if not await self.flush():
+                    # БД недоступна: не повторяем вставку на каждое новое наблюдение
+                    await asyncio.sleep(self.interval)
+        finally:
+            await self.flush()
+
+
+price_history = PriceHistoryWriter(
+    config.db.price_history_batch, config.db.price_history_interval, config.db.price_history_limit
+)
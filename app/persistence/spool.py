@@ -0,0 +1,284 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, UTC
+from types import SimpleNamespace
+
+from loguru import logger
+from sqlalchemy import exc, insert
+
+from ..core.config import load_config
+from ..misc import metrics
+from ..models.db_helper import db_helper
+from ..models.post import Status
+from ..models.post_price_history import Currency, PostPriceHistory
+from ..schemas.records import PostRecord
+from .mapper import snapshot, write
+from .posts import set_status
+from .price_history import history_row
+
+config = load_config()
+
+SEGMENT_TEMPLATE = "segment-{:06d}.jsonl"
+POSITION_FILE = "position.json"
+REJECTED_FILE = "rejected.jsonl"
+
+
+def _is_outage(error: Exception) -> bool:
+    """Ошибка доступности БД (запись повторяется), а не ошибка данных конкретной записи"""
+    if isinstance(error, (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, OSError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, exc.DBAPIError) and error.connection_invalidated
+
+
+class Spool:
+    """
+    Локальный журнал записей в БД. Воркер дописывает результат парсинга в сегментный файл
+    (JSON Lines, fsync перед возвратом) и сразу подтверждает сообщение; run() выгружает
+    журнал в БД пачками и повторяет выгрузку, пока БД недоступна. Позиция выгрузки
+    хранится в position.json, полностью выгруженные сегменты удаляются.
+    Запись может быть применена повторно (после сбоя между коммитом и сохранением позиции):
+    сохранение поста идемпотентно, повтор попадает в ветку обновления существующего поста.
+    История цен для записей спула вставляется в той же транзакции, что и пост (а не через
+    буфер price_history), с временем парсинга: так она переживает и сбой БД, и перезапуск воркера.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 64 * 1024 * 1024,
+        batch: int = 100,
+        interval: float = 1.0,
+        retry_max: float = 60.0,
+    ):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.batch = batch
+        self.interval = interval
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment: int | None = None
+        # Групповая запись: строки, ожидающие fsync, и future, который завершится после него
+        self._pending: list[bytes] = []
+        self._pending_done: asyncio.Future | None = None
+        self._writer: asyncio.Task | None = None
+        self._appended = asyncio.Event()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, SEGMENT_TEMPLATE.format(segment))
+
+    def _segments(self) -> list[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(name[len("segment-") : -len(".jsonl")])
+            for name in os.listdir(self.directory)
+            if name.startswith("segment-") and name.endswith(".jsonl")
+        )
+
+    def _write(self, lines: list[bytes]):
+        """Дописывает строки в текущий сегмент и сбрасывает их на диск (блокирующая операция)"""
+        payload = b"".join(lines)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._segment = max(self._segments(), default=1)
+                self._file = open(self._segment_path(self._segment), "ab")
+                if self._file.tell() > 0:
+                    with open(self._segment_path(self._segment), "rb") as f:
+                        f.seek(-1, os.SEEK_END)
+                        torn = f.read(1) != b"\n"
+                    if torn:
+                        # Строка, оборванная при аварийной остановке, завершается и будет пропущена при выгрузке
+                        self._file.write(b"\n")
+
+            if self._file.tell() > 0 and self._file.tell() + len(payload) > self.segment_size:
+                self._file.close()
+                self._segment += 1
+                self._file = open(self._segment_path(self._segment), "ab")
+
+            self._file.write(payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    async def _write_pending(self):
+        """Пишет накопившиеся строки одним fsync, пока они появляются"""
+        try:
+            while self._pending:
+                lines, done = self._pending, self._pending_done
+                self._pending, self._pending_done = [], None
+                try:
+                    await asyncio.to_thread(self._write, lines)
+                except Exception as e:
+                    if not done.done():
+                        done.set_exception(e)
+                else:
+                    if not done.done():
+                        done.set_result(None)
+        finally:
+            self._writer = None
+
+    async def append(self, entry: dict):
+        """Дописывает запись в спул; возвращает управление, когда запись на диске"""
+        if self._pending_done is None:
+            self._pending_done = asyncio.get_running_loop().create_future()
+        done = self._pending_done
+        self._pending.append(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_pending())
+        # Future общий для всей группы: отмена одного вызова не должна отменять ожидание остальных
+        await asyncio.shield(done)
+        metrics.spool_records.inc(result="appended")
+        self._appended.set()
+
+    async def save(self, record: PostRecord):
+        """Сохранение спарсенного объявления (mapper.write)"""
+        await self.append({"op": "save", "record": snapshot(record), "observed_at": time.time()})
+
+    async def set_status(self, post_id: str, status: Status):
+        """Смена статуса поста с отметкой updated_at (posts.set_status)"""
+        await self.append({"op": "status", "post_id": post_id, "status": status.value})
+
+    def _load_position(self) -> tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, POSITION_FILE), encoding="utf-8") as f:
+                position = json.load(f)
+            return position["segment"], position["offset"]
+        except FileNotFoundError:
+            return min(self._segments(), default=1), 0
+
+    def _save_position(self, segment: int, offset: int):
+        """Атомарно сохраняет позицию выгрузки и удаляет выгруженные сегменты"""
+        path = os.path.join(self.directory, POSITION_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segment": segment, "offset": offset}, f)
+        os.replace(tmp_path, path)
+
+        for old in self._segments():
+            if old < segment:
+                os.remove(self._segment_path(old))
+
+    def _read(self, segment: int, offset: int) -> tuple[list[dict], int, int]:
+        """До batch записей начиная с позиции; возвращает записи и позицию после них"""
+        entries = []
+        while len(entries) < self.batch:
+            later = [number for number in self._segments() if number > segment]
+            path = self._segment_path(segment)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    while len(entries) < self.batch:
+                        line = f.readline()
+                        if not line.endswith(b"\n"):
+                            # Конец файла или строка, которую ещё дописывают
+                            break
+                        offset += len(line)
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            if line.strip():
+                                logger.error(f"Пропущена повреждённая строка спула в {path}")
+            if len(entries) >= self.batch or not later:
+                break
+            if os.path.exists(path) and offset < os.path.getsize(path):
+                # В закрытом сегменте осталась только оборванная строка
+                logger.error(f"Пропущен оборванный конец сегмента {path}")
+            segment, offset = later[0], 0
+        return entries, segment, offset
+
+    def _backlog(self, segment: int, offset: int) -> int:
+        size = sum(os.path.getsize(self._segment_path(number)) for number in self._segments() if number >= segment)
+        return max(0, size - offset)
+
+    async def _apply(self, session, entry: dict):
+        """Применяет запись в открытой сессии вместе с изменением цены для истории"""
+        if entry["op"] == "status":
+            await session.execute(set_status(entry["post_id"], Status(entry["status"])))
+            return
+
+        # Поля снимка (mapper.snapshot) вместо PostRecord: так читаются и записи, сделанные другой версией воркера
+        record = SimpleNamespace(**entry["record"])
+        post_id, price_changed = await write(session, record)
+        if not price_changed:
+            return
+        # Записи, сделанные до появления observed_at, получают время выгрузки
+        observed_at = datetime.fromtimestamp(entry["observed_at"], UTC) if entry.get("observed_at") else None
+        currency = Currency(record.currency) if record.currency else None
+        row = history_row(post_id, record.total_price, currency, observed_at)
+        if row is not None:
+            await session.execute(insert(PostPriceHistory), [row])
+
+    async def _flush(self, entries: list[dict]):
+        """Применяет пачку одной транзакцией; ошибки данных разбираются по одной записи"""
+        session = db_helper.get_scope_session()
+        try:
+            for entry in entries:
+                await self._apply(session, entry)
+            await session.commit()
+            metrics.spool_records.inc(len(entries), result="flushed")
+        except Exception as e:
+            await session.rollback()
+            if _is_outage(e):
+                raise
+            logger.warning(f"Пачка спула не записана ({type(e).__name__}: {e}), записываем по одной")
+            for entry in entries:
+                await self._flush_one(session, entry)
+        finally:
+            await session.remove()
+
+    async def _flush_one(self, session, entry: dict):
+        try:
+            await self._apply(session, entry)
+            await session.commit()
+            metrics.spool_records.inc(result="flushed")
+        except Exception as e:
+            await session.rollback()
+            if _is_outage(e):
+                raise
+            # Запись, которую БД не принимает, откладывается в rejected.jsonl, чтобы не блокировать спул
+            logger.error(f"Запись спула отклонена БД ({type(e).__name__}: {e}), сохранена в {REJECTED_FILE}")
+            metrics.spool_records.inc(result="rejected")
+            line = json.dumps({**entry, "error": str(e), "rejected_at": time.time()}, ensure_ascii=False)
+            with open(os.path.join(self.directory, REJECTED_FILE), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    async def run(self):
+        """Фоновая выгрузка спула в БД"""
+        segment, offset = await asyncio.to_thread(self._load_position)
+        delay = self.interval
+        while True:
+            entries, next_segment, next_offset = await asyncio.to_thread(self._read, segment, offset)
+            if not entries:
+                if (next_segment, next_offset) != (segment, offset):
+                    segment, offset = next_segment, next_offset
+                    await asyncio.to_thread(self._save_position, segment, offset)
+                metrics.spool_backlog.set(await asyncio.to_thread(self._backlog, segment, offset))
+                self._appended.clear()
+                try:
+                    await asyncio.wait_for(self._appended.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._flush(entries)
+            except Exception as e:
+                metrics.spool_flush_errors.inc()
+                logger.warning(f"БД недоступна, выгрузка спула повторится через {delay:.0f}с: {type(e).__name__}: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max)
+                continue
+
+            delay = self.interval
+            segment, offset = next_segment, next_offset
+            await asyncio.to_thread(self._save_position, segment, offset)
+            metrics.spool_backlog.set(await asyncio.to_thread(self._backlog, segment, offset))
+
+
+spool = Spool(
+    config.spool.dir, config.spool.segment_size, config.spool.batch, config.spool.interval, config.spool.retry_max
+)
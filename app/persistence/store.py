@@ -0,0 +1,27 @@
+from ..core.config import load_config
+from ..models.post import Status
+from ..schemas.records import PostRecord, UnchangedPost
+from .mapper import save
+from .posts import touch
+from .spool import spool
+
+config = load_config()
+
+
+async def store(record: PostRecord | UnchangedPost):
+    """
+    Сохраняет результат парсинга в базу данных (persistence.mapper). Для неизменившегося
+    поста только отмечает, что он всё ещё опубликован. При SPOOL_ENABLED запись
+    дописывается в локальный спул и выгружается в БД фоновой задачей
+    """
+    if isinstance(record, UnchangedPost):
+        if config.spool.enabled:
+            await spool.set_status(record.post_id, Status.ACTIVE)
+        else:
+            await touch(record.post_id)
+        return
+
+    if config.spool.enabled:
+        await spool.save(record)
+    else:
+        await save(record)
@@ -0,0 +1,100 @@
+"""
+Офлайн-перепарсинг страниц из архива (ARCHIVE_DIR) без запросов через прокси.
+
+Пример:
+    python -m app.replay --workers 8 --uzs-rate 12650 --output reparsed.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+
+from bs4 import BeautifulSoup
+from loguru import logger
+
+from .core.config import load_config
+from .misc import convert_to_usd
+from .misc.archive import HtmlArchive
+from .parse.parse_post import BaseParser
+
+# Import parse subclasses to register them in BaseParser.registry
+from . import parse  # noqa: F401
+
+config = load_config()
+
+# Поля записи, которые не являются результатом парсинга
+SKIP_ATTRIBUTES = {"timings", "waits"}
+
+
+async def _parse_chunk(archive: HtmlArchive, entries: list[dict]) -> list[dict]:
+    results = []
+    for entry in entries:
+        soup = None
+        try:
+            soup = BeautifulSoup(archive.read(entry), "lxml")
+            post = await BaseParser(entry["url"], soup, None).execute()
+            record = {key: value for key, value in asdict(post).items() if key not in SKIP_ATTRIBUTES}
+            results.append({"id": entry["id"], "url": entry["url"], "record": record})
+        except Exception as e:
+            results.append({"id": entry["id"], "url": entry["url"], "error": f"{type(e).__name__}: {e}"})
+        finally:
+            if soup is not None:
+                soup.decompose()
+    return results
+
+
+def _replay_chunk(directory: str, entries: list[dict], uzs_rate: float | None) -> list[dict]:
+    """Выполняется в отдельном процессе"""
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+    convert_to_usd.set_static_rate(uzs_rate)
+    return asyncio.run(_parse_chunk(HtmlArchive(directory), entries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перепарсинг архива сырых HTML страниц")
+    parser.add_argument("--archive-dir", default=config.archive.dir, help="каталог архива")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="количество процессов")
+    parser.add_argument("--chunk-size", type=int, default=200, help="страниц на одну задачу процесса")
+    parser.add_argument("--output", help="файл для результатов в формате JSON Lines (по умолчанию stdout)")
+    parser.add_argument("--all-versions", action="store_true", help="перепарсить все версии, а не только последние")
+    parser.add_argument("--id", action="append", dest="ids", help="перепарсить только указанные ID (можно повторять)")
+    parser.add_argument("--uzs-rate", type=float, help="фиксированный курс UZS за 1 USD вместо запроса к API")
+    args = parser.parse_args()
+
+    entries = list(HtmlArchive(args.archive_dir).entries(latest_only=not args.all_versions))
+    if args.ids:
+        wanted = set(args.ids)
+        entries = [entry for entry in entries if entry["id"] in wanted]
+
+    chunks = [entries[i : i + args.chunk_size] for i in range(0, len(entries), args.chunk_size)]
+    logger.info(f"Перепарсинг {len(entries)} страниц: {len(chunks)} задач, {args.workers} процессов")
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    parsed = failed = 0
+    started = time.monotonic()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(_replay_chunk, args.archive_dir, chunk, args.uzs_rate) for chunk in chunks]
+            for future in as_completed(futures):
+                for result in future.result():
+                    if "error" in result:
+                        failed += 1
+                    else:
+                        parsed += 1
+                    output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Готово за {elapsed:.1f}с: успешно {parsed}, с ошибками {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Перепроверка сохранённых постов: выбирает активные посты, которые давно не проверялись,
+и публикует их ссылки в очереди с низким приоритетом. Воркер обновляет цену
+и updated_at, а снятые объявления помечает статусом removed.
+Перед публикацией пост отмечается revisit_enqueued_at и не публикуется повторно,
+пока воркер не обновит его updated_at (или не истечёт REVISIT_ENQUEUED_TTL);
+если брокер не подтвердил публикацию, отметка снимается.
+
+Запуск:
+    python -m app.revisit
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import aio_pika
+from loguru import logger
+from sqlalchemy import and_, func, or_, select, tuple_, update
+
+from .core.config import load_config
+from .misc.publisher import Publisher
+from .misc.topology import PRIORITY_RECHECK, declare_topology, routing_key
+from .misc.url import ad_id_from_url
+from .models.db_helper import db_helper
+from .models.post import Post, Source, Status
+from .schemas.message import PostMessage
+
+config = load_config()
+
+
+def due_condition(now: datetime):
+    """
+    Условие "пора перепроверить": свежие посты проверяются раз в REVISIT_MIN_AGE,
+    более старые объявления меняются реже и проверяются в REVISIT_STALE_FACTOR раз реже.
+    Посты, которые уже ждут в очереди (опубликованы после последнего updated_at), пропускаются
+    """
+    fresh_since = now - timedelta(days=config.revisit.fresh_days)
+    return and_(
+        or_(
+            and_(
+                Post.added_at >= fresh_since,
+                Post.updated_at < now - timedelta(seconds=config.revisit.min_age),
+            ),
+            and_(
+                Post.added_at < fresh_since,
+                Post.updated_at < now - timedelta(seconds=config.revisit.min_age * config.revisit.stale_factor),
+            ),
+        ),
+        or_(
+            Post.revisit_enqueued_at.is_(None),
+            Post.revisit_enqueued_at <= Post.updated_at,
+            Post.revisit_enqueued_at < now - timedelta(seconds=config.revisit.enqueued_ttl),
+        ),
+    )
+
+
+def mark_enqueued(post_ids: list[str], enqueued: bool = True):
+    """Ставит (или снимает) отметку о публикации на перепроверку; updated_at не меняется"""
+    return (
+        update(Post)
+        .where(Post.id.in_(post_ids))
+        .values(revisit_enqueued_at=func.current_timestamp() if enqueued else None, updated_at=Post.updated_at)
+    )
+
+
+def confirmed(task: asyncio.Task | None) -> bool:
+    """Опубликовано ли сообщение: задача Publisher.publish завершилась подтверждением брокера"""
+    return task is not None and task.done() and not task.cancelled() and task.result()
+
+
+async def select_due(session, now: datetime, after: tuple | None) -> list:
+    """Следующая порция постов по индексу updated_at (keyset-пагинация по (updated_at, id))"""
+    stmt = (
+        select(Post.id, Post.url, Post.updated_at, Post.type_of_property, Post.type_of_service)
+        .where(Post.status == Status.ACTIVE, Post.source == Source.OLX, due_condition(now))
+        .order_by(Post.updated_at, Post.id)
+        .limit(config.revisit.batch)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(Post.updated_at, Post.id) > after)
+    result = await session.execute(stmt)
+    return result.all()
+
+
+async def revisit(publisher: Publisher) -> int:
+    """Один проход по всем постам, которые пора перепроверить. Возвращает число опубликованных"""
+    delay = 1 / config.revisit.rate
+    published = 0
+    after = None
+
+    session = db_helper.get_scope_session()
+    try:
+        # Время берём у сервера БД, чтобы не зависеть от часового пояса воркера
+        now = (await session.execute(select(func.current_timestamp()))).scalar_one()
+        while True:
+            rows = await select_due(session, now, after)
+            if not rows:
+                await session.commit()
+                break
+
+            # Отметка ставится до публикации: воркер может взять сообщение раньше, чем опубликована вся порция.
+            # Коммит сразу, чтобы не держать транзакцию открытой, пока публикуем порцию
+            await session.execute(mark_enqueued([row.id for row in rows]))
+            await session.commit()
+
+            confirms: dict[str, asyncio.Task] = {}
+            try:
+                for row in rows:
+                    envelope = PostMessage(
+                        url=row.url,
+                        id=ad_id_from_url(row.url),
+                        post_id=row.id,
+                        source="revisit",
+                        type_of_property=row.type_of_property,
+                        type_of_service=row.type_of_service,
+                        priority=PRIORITY_RECHECK,
+                    )
+                    confirms[row.id] = await publisher.publish(
+                        envelope.to_amqp(), routing_key=routing_key(row.type_of_property, row.type_of_service)
+                    )
+                    await asyncio.sleep(delay)
+                await asyncio.wait(confirms.values())
+            finally:
+                # Неопубликованные и неподтверждённые брокером посты снова доступны следующему проходу
+                failed = [row.id for row in rows if not confirmed(confirms.get(row.id))]
+                if failed:
+                    await session.execute(mark_enqueued(failed, enqueued=False))
+                    await session.commit()
+            published += len(rows) - len(failed)
+            after = (rows[-1].updated_at, rows[-1].id)
+    finally:
+        await session.remove()
+
+    return published
+
+
+async def main():
+    rabbitmq_url = (
+        f"amqp://{config.rabbitmq.username}:{config.rabbitmq.password}@"
+        f"{config.rabbitmq.host}:{config.rabbitmq.port}/{config.rabbitmq.vhost}"
+    )
+    connection = await aio_pika.connect_robust(rabbitmq_url)
+    try:
+        channel = await connection.channel(publisher_confirms=True)
+        exchange = await declare_topology(channel)
+        publisher = Publisher(exchange, config.rabbitmq.publish_window, config.rabbitmq.publish_retries)
+
+        while True:
+            try:
+                published = await revisit(publisher)
+            finally:
+                failed = await publisher.flush()
+            logger.info(f"Отправлено на перепроверку {published} постов, не подтверждено брокером {failed}")
+            await asyncio.sleep(config.revisit.interval)
+    finally:
+        await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
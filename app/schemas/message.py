@@ -0,0 +1,50 @@
+import time
+
+import aio_pika
+from pydantic import BaseModel, Field
+
+from ..models.post import TypeOfProperty, TypeOfService
+
+CONTENT_TYPE = "application/json"
+
+
+class PostMessage(BaseModel):
+    """Конверт сообщения очереди post"""
+
+    v: int = 1
+    url: str
+    # Идентификатор объявления из ссылки (-ID<id>.html)
+    id: str | None = None
+    enqueued_at: float | None = Field(default_factory=time.time)
+    attempt: int = 0
+    source: str | None = None
+    # Подсказки, известные продюсеру заранее
+    type_of_property: TypeOfProperty | None = None
+    type_of_service: TypeOfService | None = None
+    priority: int | None = None
+    # ID сохранённого поста, если сообщение - перепроверка
+    post_id: str | None = None
+
+    @classmethod
+    def decode(cls, body: bytes, timestamp: float | None = None) -> "PostMessage":
+        """Разбирает тело сообщения; тело из одной ссылки (старый формат) тоже принимается"""
+        if body[:1] == b"{":
+            return cls.model_validate_json(body)
+        return cls(url=body.decode().strip(), enqueued_at=timestamp, source="legacy")
+
+    def encode(self) -> bytes:
+        return self.model_dump_json(exclude_none=True).encode()
+
+    def to_amqp(self) -> aio_pika.Message:
+        return aio_pika.Message(
+            body=self.encode(),
+            content_type=CONTENT_TYPE,
+            priority=self.priority,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        )
+
+    def queue_wait(self) -> float | None:
+        """Сколько секунд прошло с первой постановки в очередь"""
+        if self.enqueued_at is None:
+            return None
+        return max(0.0, time.time() - self.enqueued_at)
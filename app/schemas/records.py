@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+
+from ..models.post_price_history import Currency
+from ..models.post_sale_commerce import Purpose
+from ..models.post_sale_apartment import BuildingMaterial, Repair
+from ..models.post_sale_house import HouseType
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class PostRecord:
+    """
+    Результат парсинга объявления: только поля для сохранения, без DOM, HTML и сессии.
+    Создаётся парсером (BaseParser.execute) и передаётся в persistence
+    """
+
+    type_of_property: str
+    type_of_service: str
+    url: str
+    title: str
+    description: str
+    external_id: str
+    organization_url: str | None = None
+    polygon_id: int | None = None
+    content_hash: str | None = None
+    total_price: int | None = None
+    currency: Currency | None = None
+    phone_number: str | None = None
+    is_broker: bool = False
+    # Время по этапам парсинга, секунды (в БД не сохраняется)
+    timings: dict[str, float] = field(default_factory=dict, compare=False, repr=False)
+    # Ожидание сети и БД во время парсинга, секунды; в timings не входит
+    waits: dict[str, float] = field(default_factory=dict, compare=False, repr=False)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ApartmentRecord(PostRecord):
+    rooms: int | None = None
+    floor: int | None = None
+    total_floor: int | None = None
+    total_area_sqm: int | None = None
+    is_new_building: bool = False
+    has_furniture: bool = False
+    repair: Repair | None = None
+    building_material: BuildingMaterial | None = None
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class HouseRecord(PostRecord):
+    rooms: int | None = None
+    total_floor: int | None = None
+    total_area_sqm: int | None = None
+    land_area_sqm: int | None = None
+    price_per_square: float | None = None
+    has_furniture: bool = False
+    repair: Repair | None = None
+    building_material: BuildingMaterial | None = None
+    house_type: HouseType | None = None
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class CommerceRecord(PostRecord):
+    floor: int | None = None
+    total_floor: int | None = None
+    total_area_sqm: int | None = None
+    land_area_sqm: int | None = None
+    repair: Repair | None = None
+    purpose: Purpose | None = None
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class UnchangedPost:
+    """Сохранённый пост, содержимое которого не изменилось с прошлой загрузки"""
+
+    post_id: str
+    external_id: str
+    timings: dict[str, float] = field(default_factory=dict, compare=False, repr=False)
+    waits: dict[str, float] = field(default_factory=dict, compare=False, repr=False)
@@ -0,0 +1,161 @@
+"""
+Бенчмарк записи в БД: сохранение спарсенных объявлений тем же путём, что и в воркере
+(persistence.store и буфер истории цен), без сети и OLX.
+
+Фикстуры bench/fixtures разбираются один раз, затем размножаются с новыми external_id:
+    insert   - новые посты (организация, пост, таблица деталей)
+    refresh  - повторная загрузка тех же постов, у части меняется цена
+    history  - запись накопленной истории цен одним буфером
+
+БД - DB_URL/DB_* из окружения или --db-url. На SQLite таблицы создаются сами,
+так что прогон не требует сервера и его можно сравнить с MySQL.
+
+Пример:
+    python -m bench.dbwrite --db-url sqlite+aiosqlite:///bench.db --posts 2000 --concurrency 1,4,16
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import sys
+import time
+
+from .loadtest import _percentile
+from .parsers import FIXTURES_DIR, UZS_RATE, fixture_url
+
+
+async def parse_fixtures() -> list:
+    """Записи парсеров по всем фикстурам (без полигонального сервиса и БД)"""
+    from bs4 import BeautifulSoup
+
+    from app.parse.parse_post import BaseParser
+
+    posts = []
+    for path in sorted(FIXTURES_DIR.glob("*.html")):
+        soup = BeautifulSoup(path.read_text(encoding="utf-8"), "lxml")
+        try:
+            posts.append(await BaseParser(fixture_url(path.stem), soup, None).execute())
+        finally:
+            soup.decompose()
+    return posts
+
+
+def clone(posts: list, count: int, first_id: int) -> list:
+    """count копий спарсенных постов с уникальными external_id и url"""
+    clones = []
+    for index in range(count):
+        external_id = str(first_id + index)
+        url = f"https://www.olx.uz/d/obyavlenie/bench-ID{external_id}.html"
+        clones.append(dataclasses.replace(posts[index % len(posts)], external_id=external_id, url=url))
+    return clones
+
+
+async def save_all(posts: list, concurrency: int) -> tuple[float, list[float]]:
+    """Параллельный store(); возвращает общее время и длительности отдельных сохранений"""
+    from app.persistence.store import store
+
+    semaphore = asyncio.Semaphore(concurrency)
+    durations: list[float] = []
+
+    async def save(post):
+        async with semaphore:
+            started = time.perf_counter()
+            await store(post)
+            durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(save(post) for post in posts))
+    return time.perf_counter() - started, durations
+
+
+def _phase(name: str, rows: int, elapsed: float, durations: list[float] | None = None) -> dict:
+    result = {"phase": name, "rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed, 1)}
+    if durations:
+        result["p50"] = _percentile(durations, 0.5)
+        result["p99"] = _percentile(durations, 0.99)
+    return result
+
+
+async def run(args) -> list[dict]:
+    if args.db_url:
+        os.environ["DB_URL"] = args.db_url
+    # Конфигурация читается при импорте модулей приложения; сеть прогону не нужна
+    for name, value in (
+        ("PROXIES_IP", "127.0.0.1"),
+        ("PROXY_LOGIN", ""),
+        ("PROXY_PASSWORD", ""),
+        ("PROXY_PORT", "0"),
+        ("RABBITMQ_HOST", "bench"),
+        ("RABBITMQ_USERNAME", "bench"),
+        ("RABBITMQ_PASSWORD", "bench"),
+    ):
+        os.environ.setdefault(name, value)
+
+    from loguru import logger
+
+    from app import parse  # noqa: F401  регистрирует парсеры типов недвижимости
+    from app.misc import convert_to_usd
+    from app.models.db_helper import db_helper
+    from app.persistence.price_history import price_history
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+    convert_to_usd.set_static_rate(UZS_RATE)
+
+    if db_helper.dialect == "sqlite":
+        await db_helper.create_all()
+
+    parsed = await parse_fixtures()
+    if not parsed:
+        raise SystemExit("Нет фикстур: python -m bench.parsers --generate")
+
+    results = []
+    for index, concurrency in enumerate(int(value) for value in args.concurrency.split(",")):
+        posts = clone(parsed, args.posts, args.first_id + index * args.posts)
+        common = {"db": db_helper.dialect, "concurrency": concurrency}
+
+        elapsed, durations = await save_all(posts, concurrency)
+        results.append({**common, **_phase("insert", len(posts), elapsed, durations)})
+
+        # Каждый change_every-й пост приходит с новой ценой и попадает в историю цен
+        posts = [
+            dataclasses.replace(post, total_price=post.total_price + 1)
+            if post.total_price is not None and number % args.change_every == 0
+            else post
+            for number, post in enumerate(posts)
+        ]
+        elapsed, durations = await save_all(posts, concurrency)
+        results.append({**common, **_phase("refresh", len(posts), elapsed, durations)})
+
+        pending = len(price_history._rows)
+        started = time.perf_counter()
+        await price_history.flush()
+        results.append({**common, **_phase("history", pending, max(time.perf_counter() - started, 1e-9))})
+
+    await db_helper.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк записи объявлений в БД")
+    parser.add_argument("--db-url", help="URL базы вместо DB_*, например sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--posts", type=int, default=1000, help="постов в прогоне")
+    parser.add_argument("--concurrency", default="4", help="параллельных сохранений, через запятую")
+    parser.add_argument("--change-every", type=int, default=5, help="у каждого N-го поста меняется цена")
+    parser.add_argument("--first-id", type=int, default=700_000_000, help="первый external_id")
+    parser.add_argument("--log-level", default="ERROR")
+    parser.add_argument("--output", help="дописывать результаты в файл JSON Lines")
+    args = parser.parse_args()
+
+    for result in asyncio.run(run(args)):
+        line = json.dumps(result, ensure_ascii=False)
+        print(line)
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as output:
+                output.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
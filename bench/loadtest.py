@@ -0,0 +1,302 @@
+"""
+Офлайн нагрузочный тест воркера: настоящий process_message против локальных
+заменителей OLX (через "прокси" 127.0.0.x), полигонального сервиса, API курсов
+и брокера в памяти. БД - из переменных окружения DB_* (локальный MySQL
+с применёнными миграциями; лучше отдельная, посты прогонов остаются в ней)
+или --db-url, например sqlite+aiosqlite:///bench.db: таблицы SQLite создаются сами.
+
+Каждая конфигурация запускается в отдельном процессе, результат - строка JSON:
+страниц в секунду, p50/p99 обработки сообщения и RSS процесса.
+
+Пример:
+    python -m bench.loadtest --messages 2000 --concurrency 4,8,16 --latency-ms 150,400
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Доля сообщений каждого вида по умолчанию
+DEFAULT_MIX = "ad=0.82,forbidden=0.04,challenge=0.03,flaky=0.03,missing=0.03,gone=0.03,soft404=0.02"
+
+
+class MemoryMessage:
+    """Сообщение брокера в памяти с интерфейсом aio_pika.IncomingMessage, который использует воркер"""
+
+    def __init__(self, broker: "MemoryBroker", body: bytes, priority: int | None = None, timestamp=None):
+        self.broker = broker
+        self.body = body
+        self.priority = priority
+        self.timestamp = timestamp
+        self.settled = False
+
+    async def ack(self):
+        self._settle()
+
+    async def nack(self, requeue: bool = True):
+        if requeue:
+            self.broker.put(MemoryMessage(self.broker, self.body, self.priority, self.timestamp))
+        self._settle()
+
+    def _settle(self):
+        if self.settled:
+            return
+        self.settled = True
+        self.broker.settle()
+
+
+class MemoryExchange:
+    """Exchange с интерфейсом, который нужен misc.publisher.Publisher"""
+
+    def __init__(self, broker: "MemoryBroker"):
+        self.broker = broker
+        self.published = 0
+
+    async def publish(self, message, routing_key: str):
+        self.published += 1
+        self.broker.put(MemoryMessage(self.broker, message.body, message.priority))
+
+
+class MemoryBroker:
+    """
+    Одна очередь без маршрутизации. Как и prefetch в RabbitMQ, ограничивает
+    число выданных, но ещё не подтверждённых сообщений.
+    """
+
+    def __init__(self, prefetch: int):
+        self.queue: asyncio.Queue[MemoryMessage] = asyncio.Queue()
+        self.prefetch = asyncio.Semaphore(prefetch)
+        self.unsettled = 0
+
+    def put(self, message: MemoryMessage):
+        self.unsettled += 1
+        self.queue.put_nowait(message)
+
+    def settle(self):
+        self.unsettled -= 1
+        self.prefetch.release()
+
+    async def get(self) -> MemoryMessage:
+        await self.prefetch.acquire()
+        return await self.queue.get()
+
+
+def _parse_mix(mix: str) -> dict[str, float]:
+    from .server import KINDS
+
+    weights = {}
+    for part in mix.split(","):
+        kind, weight = part.split("=")
+        if kind not in KINDS:
+            raise SystemExit(f"Неизвестный вид ответа: {kind} (доступны: {', '.join(KINDS)})")
+        weights[kind] = float(weight)
+    return weights
+
+
+def _rss_mb() -> tuple[float, float]:
+    """Текущий и пиковый RSS процесса, МБ"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    current = peak
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return round(current, 1), round(peak, 1)
+
+
+def _percentile(samples: list[float], q: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+async def run(args) -> dict:
+    """Один прогон в текущем процессе"""
+    from .server import FakeServices, BENCH_HOST, ad_url
+
+    proxy_hosts = [f"127.0.0.{i}" for i in range(2, 2 + args.proxies)]
+    archive = None
+    if args.archive_dir:
+        from app.misc.archive import HtmlArchive
+
+        archive = HtmlArchive(args.archive_dir)
+    services = FakeServices(args.latency_ms, args.latency_sigma, filler_kb=args.filler_kb, archive=archive)
+    port = await services.start(["127.0.0.1", *proxy_hosts])
+
+    state_dir = tempfile.mkdtemp(prefix="olx-bench-")
+    # Конфигурация читается при импорте модулей приложения, поэтому окружение задаём до импорта
+    os.environ.update(
+        PROXIES_IP=",".join(proxy_hosts),
+        PROXY_PORT=str(port),
+        PROXY_LOGIN="",
+        PROXY_PASSWORD="",
+        PROXY_STATE_PATH=os.path.join(state_dir, "proxy_state.json"),
+        PROXY_COOLDOWN=str(args.proxy_cooldown),
+        ALLOWED_DOMAINS=BENCH_HOST,
+        POLYGON_SERVICE_URL=f"http://127.0.0.1:{port}/search",
+        CURRENCY_API_URL=f"http://127.0.0.1:{port}/v6/latest/USD",
+        WORKER_CONCURRENCY=str(args.concurrency),
+        HEDGE_ENABLED=str(args.hedge),
+        SUCCESS_DELAY_MIN="0",
+        SUCCESS_DELAY_MAX="0",
+        ARCHIVE_ENABLED="False",
+        METRICS_ENABLED="False",
+    )
+    if args.db_url:
+        os.environ["DB_URL"] = args.db_url
+    for name in ("RABBITMQ_HOST", "RABBITMQ_USERNAME", "RABBITMQ_PASSWORD"):
+        os.environ.setdefault(name, "bench")
+
+    import aiohttp
+    from loguru import logger
+
+    from app import main as worker
+    from app.misc.publisher import Publisher
+    from app.models.db_helper import db_helper
+    from app.persistence.price_history import price_history
+    from app.schemas.message import PostMessage
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    if db_helper.dialect == "sqlite":
+        await db_helper.create_all()
+    worker._proxy.load()
+    broker = MemoryBroker(args.concurrency)
+    worker._publisher = Publisher(MemoryExchange(broker))
+
+    rng = random.Random(args.seed)
+    mix = _parse_mix(args.mix)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=args.messages)
+    for ad_id, kind in enumerate(kinds, start=args.first_id):
+        envelope = PostMessage(url=ad_url(kind, rng.choice(("apartment", "house", "commerce")), ad_id), source="bench")
+        broker.put(MemoryMessage(broker, envelope.encode()))
+
+    durations: list[float] = []
+    history_task = asyncio.create_task(price_history.run())
+
+    async def handle(message: MemoryMessage, session: aiohttp.ClientSession):
+        started = time.perf_counter()
+        await worker.handle_message(message, session)
+        durations.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=10, limit_per_host=5, ttl_dns_cache=300, force_close=True)
+    tasks = set()
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10)) as session:
+        while broker.unsettled:
+            getter = asyncio.ensure_future(broker.get())
+            # Сообщения могут вернуться в очередь позже (requeue), поэтому ждём либо сообщение, либо завершения
+            while not getter.done() and broker.unsettled:
+                await asyncio.wait({getter}, timeout=0.1)
+            if not getter.done():
+                getter.cancel()
+                break
+            task = asyncio.create_task(handle(getter.result(), session))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    history_task.cancel()
+    await asyncio.gather(history_task, return_exceptions=True)
+    await services.stop()
+    await db_helper.engine.dispose()
+
+    rss, peak_rss = _rss_mb()
+    from app.misc import metrics
+
+    return {
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "proxies": args.proxies,
+        "hedge": args.hedge,
+        "db": db_helper.dialect,
+        "messages": args.messages,
+        "deliveries": len(durations),
+        "parsed": metrics.messages.value(result="parsed"),
+        "seconds": round(elapsed, 2),
+        "pages_per_sec": round(args.messages / elapsed, 2),
+        "p50": _percentile(durations, 0.5),
+        "p99": _percentile(durations, 0.99),
+        "rss_mb": rss,
+        "peak_rss_mb": peak_rss,
+        "upstream_requests": dict(services.requests),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн нагрузочный тест воркера")
+    parser.add_argument("--messages", type=int, default=1000, help="сообщений в прогоне")
+    parser.add_argument("--concurrency", default="4", help="WORKER_CONCURRENCY, через запятую")
+    parser.add_argument("--latency-ms", default="300", help="медиана задержки ответа OLX, мс, через запятую")
+    parser.add_argument("--latency-sigma", type=float, default=0.6, help="sigma логнормальной задержки")
+    parser.add_argument("--proxies", default="8", help="количество прокси, через запятую")
+    parser.add_argument("--hedge", default="False", help="HEDGE_ENABLED: False, True или оба через запятую")
+    parser.add_argument("--proxy-cooldown", type=int, default=5, help="PROXY_COOLDOWN, секунды")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="доли видов ответов, вид=доля через запятую")
+    parser.add_argument("--filler-kb", type=int, default=64, help="размер синтетической страницы, КБ")
+    parser.add_argument("--archive-dir", help="отдавать сохранённые страницы из архива (ARCHIVE_DIR)")
+    parser.add_argument("--db-url", help="URL базы вместо DB_*, например sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--first-id", type=int, default=900_000_000, help="первый ID объявления")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="ERROR")
+    parser.add_argument("--output", help="дописывать результаты в файл JSON Lines")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        args.concurrency, args.proxies = int(args.concurrency), int(args.proxies)
+        args.latency_ms = float(args.latency_ms)
+        print(json.dumps(asyncio.run(run(args)), ensure_ascii=False))
+        return
+
+    # Каждая конфигурация - в своём процессе: конфигурация приложения читается при импорте,
+    # а RSS не должен смешиваться между прогонами
+    configurations = itertools.product(
+        args.concurrency.split(","), args.latency_ms.split(","), args.proxies.split(","), args.hedge.split(",")
+    )
+    passthrough = [
+        "--messages", str(args.messages), "--latency-sigma", str(args.latency_sigma),
+        "--proxy-cooldown", str(args.proxy_cooldown), "--mix", args.mix, "--filler-kb", str(args.filler_kb),
+        "--seed", str(args.seed), "--log-level", args.log_level,
+    ]
+    if args.archive_dir:
+        passthrough += ["--archive-dir", args.archive_dir]
+    if args.db_url:
+        passthrough += ["--db-url", args.db_url]
+
+    for index, (concurrency, latency_ms, proxies, hedge) in enumerate(configurations):
+        # Свои ID на каждый прогон, чтобы посты предыдущих прогонов не попадали в ветку "уже существует"
+        first_id = args.first_id + index * args.messages
+        command = [
+            sys.executable, "-m", "bench.loadtest", "--single", "--concurrency", concurrency,
+            "--latency-ms", latency_ms, "--proxies", proxies, "--hedge", hedge,
+            "--first-id", str(first_id), *passthrough,
+        ]
+        completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            print(f"Прогон {concurrency=} {latency_ms=} {proxies=} {hedge=} завершился с ошибкой", file=sys.stderr)
+            continue
+
+        line = completed.stdout.strip().splitlines()[-1]
+        print(line)
+        if args.output:
+            with open(args.output, "a", encoding="utf-8") as output:
+                output.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
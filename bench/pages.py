@@ -0,0 +1,155 @@
+"""
+Синтетические страницы в разметке OLX для бенчмарков.
+
+Это не сохранённые страницы OLX: разметка повторяет ровно те элементы, которые
+читают BaseParser и парсеры типов недвижимости, остальное - наполнитель нужного размера.
+"""
+
+import random
+
+PROPERTIES = ("apartment", "house", "commerce")
+
+BREADCRUMBS = {
+    "apartment": ("kvartiry", "Квартиры"),
+    "house": ("doma", "Дома"),
+    "commerce": ("kommercheskie-pomeshcheniya", "Коммерческие помещения"),
+}
+SERVICES = {"sale": "Продажа", "rent": "Аренда долгосрочная"}
+
+REPAIRS = ("Авторский проект", "Евроремонт", "Средний", "Требует ремонта", "Черновая отделка", "Предчистовая отделка")
+MATERIALS = ("Кирпичный", "Панельный", "Монолитный", "Блочный", "Деревянный")
+HOUSE_TYPES = ("Дом", "Коттедж", "Дача", "Таунхаус", "Часть дома")
+PURPOSES = ("Офисы", "Склады", "Магазины/бутики", "Рестораны/кафе/бары", "Помещения свободного назначения")
+DISTRICTS = ("Юнусабадский", "Мирзо-Улугбекский", "Чиланзарский", "Яккасарайский", "Шайхантахурский")
+
+WORDS = (
+    "продается", "квартира", "ремонт", "рядом", "метро", "школа", "детский", "сад", "парковка",
+    "документы", "готовы", "торг", "уместен", "светлая", "тихий", "двор", "мебель", "техника",
+    "остается", "центр", "района", "новый", "дом", "охрана", "лифт", "балкон", "вид", "парк",
+)
+
+
+def _description(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(3, 8)):
+        words = rng.choices(WORDS, k=rng.randint(6, 14))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def _price(rng: random.Random, service: str, currency: str | None) -> str:
+    if currency is None:
+        currency = "uzs" if rng.random() < 0.2 else "usd"
+    if currency == "uzs":
+        # Часть объявлений в сумах - для них вызывается API курсов
+        if service == "sale":
+            amount = rng.randrange(300_000_000, 3_000_000_000, 1_000_000)
+        else:
+            amount = rng.randrange(3_000_000, 30_000_000, 100_000)
+        return f"{amount:,}".replace(",", " ") + " сум"
+    amount = rng.randrange(20_000, 400_000, 500) if service == "sale" else rng.randrange(200, 3_000, 50)
+    return f"{amount:,}".replace(",", " ") + " у.е."
+
+
+def _params(rng: random.Random, type_of_property: str) -> list[str]:
+    floors = rng.randint(2, 16)
+    if type_of_property == "apartment":
+        return [
+            f"Количество комнат: {rng.randint(1, 5)}",
+            f"Общая площадь: {rng.randint(25, 160)} м²",
+            f"Этаж: {rng.randint(1, floors)}",
+            f"Этажность дома: {floors}",
+            f"Тип жилья: {rng.choice(('Вторичный рынок', 'Новостройки'))}",
+            f"Тип строения: {rng.choice(MATERIALS)}",
+            f"Ремонт: {rng.choice(REPAIRS)}",
+            f"Меблирована: {rng.choice(('Да', 'Нет'))}",
+        ]
+    if type_of_property == "house":
+        return [
+            f"Тип дома: {rng.choice(HOUSE_TYPES)}",
+            f"Количество комнат: {rng.randint(2, 9)}",
+            f"Общая площадь: {rng.randint(60, 600)} м²",
+            f"Площадь участка: {rng.randint(2, 20)} сот",
+            f"Этажность дома: {rng.randint(1, 3)}",
+            f"Тип строения: {rng.choice(MATERIALS)}",
+            f"Ремонт: {rng.choice(REPAIRS)}",
+            f"Меблирована: {rng.choice(('Да', 'Нет'))}",
+        ]
+    return [
+        f"Тип недвижимости: {rng.choice(PURPOSES)}",
+        f"Общая площадь: {rng.randint(20, 2000)} м²",
+        f"Этаж: {rng.randint(1, floors)}",
+        f"Этажность дома: {floors}",
+        f"Ремонт: {rng.choice(REPAIRS)}",
+    ]
+
+
+def _filler(rng: random.Random, size: int) -> str:
+    """Наполнитель, имитирующий встроенные скрипты и состояние приложения"""
+    chunk = "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=1024))
+    return f'<script>window.__PRERENDERED_STATE__ = "{chunk * (size // 1024)}";</script>'
+
+
+def render_ad(
+    ad_id: int,
+    type_of_property: str | None = None,
+    filler_kb: int = 64,
+    service: str | None = None,
+    currency: str | None = None,
+) -> str:
+    """Страница объявления; содержимое детерминировано по ad_id, незаданные тип, услуга и валюта - случайные"""
+    rng = random.Random(ad_id)
+    type_of_property = type_of_property or rng.choice(PROPERTIES)
+    service = service or rng.choice(tuple(SERVICES))
+    slug, property_title = BREADCRUMBS[type_of_property]
+    title = f"{rng.choice(DISTRICTS)} район, {property_title.lower()} - {rng.choice(WORDS)} {rng.choice(WORDS)}"
+    params = "".join(f"<p>{param}</p>" for param in _params(rng, type_of_property))
+    profile = f"/list/user/u{rng.randrange(10**6):06d}/"
+
+    return f"""<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>{title}: {SERVICES[service]} - OLX.uz</title>
+{_filler(rng, filler_kb * 1024)}
+</head>
+<body>
+<div id="mainContent">
+<ol data-testid="breadcrumbs">
+<li data-testid="breadcrumb-item"><a href="/">Главная</a></li>
+<li data-testid="breadcrumb-item"><a href="/nedvizhimost/">Недвижимость</a></li>
+<li data-testid="breadcrumb-item"><a href="/nedvizhimost/{slug}/">{property_title}</a></li>
+<li data-testid="breadcrumb-item"><a href="/nedvizhimost/{slug}/{service}/">{SERVICES[service]}</a></li>
+<li data-testid="breadcrumb-item"><a href="/nedvizhimost/{slug}/tashkent/">Ташкент</a></li>
+</ol>
+<div data-testid="ad-price-container"><h3>{_price(rng, service, currency)}</h3></div>
+<div data-testid="ad-parameters-container"><p>Частное лицо</p>{params}</div>
+<div data-cy="ad_description"><h3>Описание</h3><div>{_description(rng)}</div></div>
+<div data-cy="ad-footer-bar-section"><span>ID: <!-- -->{ad_id}</span></div>
+<div data-testid="user-profile"><a name="user_ads" href="{profile}">Все объявления автора</a></div>
+</div>
+</body>
+</html>
+"""
+
+
+def render_not_found(filler_kb: int = 8) -> str:
+    """Снятое объявление: сервер отвечает 200"""
+    rng = random.Random(0)
+    return f"""<!DOCTYPE html>
+<html lang="ru">
+<head><meta charset="utf-8"><title>OLX.uz</title>{_filler(rng, filler_kb * 1024)}</head>
+<body><div data-testid="ad-inactive-msg">Объявление больше не доступно</div></body>
+</html>
+"""
+
+
+def render_challenge() -> str:
+    """Cloudflare challenge вместо страницы"""
+    return """<!DOCTYPE html>
+<html lang="en-US">
+<head><title>Just a moment...</title></head>
+<body><script>window._cf_chl_opt = {cType: "managed"};</script>
+<script src="/cdn-cgi/challenge-platform/h/g/orchestrate/chl_page/v1"></script></body>
+</html>
+"""
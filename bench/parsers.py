@@ -0,0 +1,277 @@
+"""
+Микробенчмарк парсеров на фикстурах bench/fixtures и проверка результата по golden-файлам.
+
+Для каждой фикстуры <name>.html ожидаемая запись лежит в <name>.json. Прогон
+сравнивает результат парсинга с golden-файлом и печатает время и выделенную
+память по этапам: построение DOM, каждый __extract_* метод, полный execute().
+Код возврата: 1 - результат отличается от golden-файла, 2 - golden-файлов нет.
+
+Примеры:
+    python -m bench.parsers                      # сверка с golden и замеры
+    python -m bench.parsers --iterations 200 -k apartment
+    python -m bench.parsers --record             # перезаписать golden-файлы
+    python -m bench.parsers --generate           # пересоздать синтетические фикстуры
+    python -m bench.parsers --import page.html --name apartment-sale-usd-real
+"""
+
+import argparse
+import asyncio
+import enum
+import json
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import asdict
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Курс для сумовых фикстур: golden-файлы записаны с ним
+UZS_RATE = 12650.0
+
+# Атрибуты парсера, которые не являются результатом парсинга
+SKIP_ATTRIBUTES = {"soup", "html", "session", "timings", "waits"}
+
+
+def fixture_url(name: str) -> str:
+    return f"https://www.olx.uz/d/obyavlenie/{name}.html"
+
+
+def generate():
+    """Синтетические фикстуры на каждое сочетание типа недвижимости, услуги и валюты"""
+    from .pages import PROPERTIES, SERVICES, render_ad
+
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    ad_id = 800_000_001
+    for type_of_property in PROPERTIES:
+        for service in SERVICES:
+            for currency in ("usd", "uzs"):
+                html = render_ad(ad_id, type_of_property, filler_kb=16, service=service, currency=currency)
+                path = FIXTURES_DIR / f"{type_of_property}-{service}-{currency}.html"
+                path.write_text(html, encoding="utf-8")
+                print(f"{path.name}: {len(html)} символов")
+                ad_id += 1
+
+
+def _jsonable(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def to_record(record) -> dict:
+    """Запись парсера (app.schemas.records) в виде словаря для golden-файла"""
+    return {key: _jsonable(value) for key, value in sorted(asdict(record).items()) if key not in SKIP_ATTRIBUTES}
+
+
+def _stages(cls) -> list[tuple[str, object]]:
+    """__extract_* методы класса в порядке объявления - в том же порядке их вызывают parse()/execute()"""
+    prefix = f"_{cls.__name__}__"
+    return [
+        (f"{cls.__name__}.{name.removeprefix(prefix)}", method)
+        for name, method in vars(cls).items()
+        if name.startswith(f"{prefix}extract_")
+    ]
+
+
+class _Timer:
+    """Длительность блока, мкс"""
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.value = (time.perf_counter() - self.started) * 1e6
+
+
+class _Allocations:
+    """Пик выделенной в блоке памяти, КиБ (нужен запущенный tracemalloc)"""
+
+    def __enter__(self):
+        tracemalloc.reset_peak()
+        self.before = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc):
+        self.value = (tracemalloc.get_traced_memory()[1] - self.before) / 1024
+
+
+async def _call(method, parser):
+    result = method(parser)
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def run_stages(name: str, html: str, probe) -> tuple[dict, dict[str, float]]:
+    """
+    Разбирает страницу по этапам, замеряя каждый через probe (_Timer или _Allocations).
+    Возвращает запись полного execute() и замеры по этапам
+    """
+    from bs4 import BeautifulSoup
+
+    from app.misc.fingerprint import content_fingerprint
+    from app.parse.parse_post import BaseParser
+
+    values = {}
+    with probe() as measured:
+        soup = BeautifulSoup(html, "lxml")
+    values["soup"] = measured.value
+
+    try:
+        base = BaseParser(fixture_url(name), soup, None)
+        for stage, method in _stages(BaseParser):
+            with probe() as measured:
+                await _call(method, base)
+            values[stage] = measured.value
+        with probe() as measured:
+            content_fingerprint(base.soup, base.title, base.description)
+        values["BaseParser.content_fingerprint"] = measured.value
+
+        cls = BaseParser.registry[base.type_of_property]
+        parser = cls(fixture_url(name), soup, None, html=base.html)
+        parser.__dict__.update({key: value for key, value in vars(base).items() if key not in SKIP_ATTRIBUTES})
+        for stage, method in _stages(cls):
+            with probe() as measured:
+                await _call(method, parser)
+            values[stage] = measured.value
+    finally:
+        soup.decompose()
+
+    # Полный путь, как в воркере: DOM + BaseParser.execute()
+    with probe() as measured:
+        soup = BeautifulSoup(html, "lxml")
+        try:
+            record = to_record(await BaseParser(fixture_url(name), soup, None).execute())
+        finally:
+            soup.decompose()
+    values["execute (итого)"] = measured.value
+    return record, values
+
+
+async def measure(name: str, html: str, iterations: int) -> tuple[dict, dict, dict]:
+    """Медиана времени (мкс) и пик выделенной памяти (КиБ) по этапам"""
+    durations = defaultdict(list)
+    for _ in range(iterations):
+        record, values = await run_stages(name, html, _Timer)
+        for stage, micros in values.items():
+            durations[stage].append(micros)
+
+    # Память меряем отдельным проходом: tracemalloc сильно замедляет код
+    tracemalloc.start()
+    try:
+        _, allocations = await run_stages(name, html, _Allocations)
+    finally:
+        tracemalloc.stop()
+
+    medians = {stage: statistics.median(values) for stage, values in durations.items()}
+    return record, medians, allocations
+
+
+def _print_table(name: str, medians: dict, allocations: dict):
+    print(f"\n{name}")
+    print(f"  {'этап':<44} {'мкс (медиана)':>14} {'КиБ (пик)':>11}")
+    for stage, micros in medians.items():
+        print(f"  {stage:<44} {micros:>14.1f} {allocations.get(stage, 0):>11.1f}")
+
+
+def _diff(expected: dict, actual: dict) -> list[str]:
+    keys = sorted(set(expected) | set(actual))
+    return [
+        f"  {key}: ожидалось {expected.get(key)!r}, получено {actual.get(key)!r}"
+        for key in keys
+        if expected.get(key) != actual.get(key)
+    ]
+
+
+async def run(args) -> int:
+    from loguru import logger
+
+    from app.misc import convert_to_usd
+
+    # Импорт регистрирует парсеры типов недвижимости в BaseParser.registry
+    from app import parse  # noqa: F401
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+    convert_to_usd.set_static_rate(UZS_RATE)
+
+    fixtures = sorted(FIXTURES_DIR.glob("*.html"))
+    if args.filter:
+        fixtures = [path for path in fixtures if args.filter in path.stem]
+    if not fixtures:
+        print("Нет фикстур: python -m bench.parsers --generate", file=sys.stderr)
+        return 1
+
+    failed = 0
+    missing = []
+    totals = defaultdict(float)
+    for path in fixtures:
+        html = path.read_text(encoding="utf-8")
+        golden_path = path.with_suffix(".json")
+        record, medians, allocations = await measure(path.stem, html, args.iterations)
+
+        if args.record:
+            golden_path.write_text(json.dumps(record, ensure_ascii=False, indent=2, sort_keys=True) + "\n", "utf-8")
+            print(f"{golden_path.name}: записан")
+        elif not golden_path.exists():
+            # Отсутствие golden-файла - не расхождение: сверять не с чем
+            missing.append(path.stem)
+        else:
+            differences = _diff(json.loads(golden_path.read_text(encoding="utf-8")), record)
+            if differences:
+                print(f"{path.stem}: результат отличается от golden-файла", file=sys.stderr)
+                print("\n".join(differences), file=sys.stderr)
+                failed += 1
+
+        _print_table(path.stem, medians, allocations)
+        for stage, micros in medians.items():
+            totals[stage.split(".")[-1]] += micros
+
+    print("\nСумма по всем фикстурам, мкс:")
+    for stage, micros in sorted(totals.items(), key=lambda item: -item[1]):
+        print(f"  {stage:<44} {micros:>14.1f}")
+
+    if missing:
+        print(
+            f"\nНет golden-файлов для {len(missing)} фикстур, результат не сверялся: {', '.join(missing)}\n"
+            f"Запишите их: python -m bench.parsers --record",
+            file=sys.stderr,
+        )
+    if failed:
+        print(f"\nРезультат отличается от golden-файла у {failed} фикстур", file=sys.stderr)
+        return 1
+    return 2 if missing else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарк парсеров на golden-фикстурах")
+    parser.add_argument("--iterations", type=int, default=50, help="повторов на фикстуру")
+    parser.add_argument("-k", dest="filter", help="только фикстуры, в имени которых есть подстрока")
+    parser.add_argument("--record", action="store_true", help="перезаписать golden-файлы текущим результатом")
+    parser.add_argument("--generate", action="store_true", help="пересоздать синтетические фикстуры")
+    parser.add_argument("--import", dest="import_path", help="добавить сохранённую страницу объявления в фикстуры")
+    parser.add_argument("--name", help="имя фикстуры для --import: <тип>-<услуга>-<валюта>[-суффикс]")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate()
+        return
+    if args.import_path:
+        if not args.name:
+            parser.error("--import требует --name")
+        FIXTURES_DIR.mkdir(exist_ok=True)
+        shutil.copyfile(args.import_path, FIXTURES_DIR / f"{args.name}.html")
+        print(f"Добавлена фикстура {args.name}; запишите golden-файл: python -m bench.parsers --record -k {args.name}")
+        return
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Локальные заменители внешних сервисов для нагрузочного теста: HTTP-прокси,
+через который "загружаются" страницы OLX, полигональный сервис /search и API курсов.
+
+Вид ответа задаётся префиксом slug в ссылке на объявление:
+    http://olx.bench/d/obyavlenie/<kind>-<property>-ID<число>.html
+где kind - один из KINDS.
+"""
+
+import asyncio
+import math
+import random
+import re
+from collections import Counter
+
+from aiohttp import web
+
+from .pages import PROPERTIES, render_ad, render_challenge, render_not_found
+
+BENCH_HOST = "olx.bench"
+
+# Вид ответа -> описание
+KINDS = {
+    "ad": "200, страница объявления",
+    "forbidden": "403 на первый запрос, затем объявление (бан прокси)",
+    "challenge": "challenge-страница на первый запрос, затем объявление",
+    "flaky": "502 на первый запрос, затем объявление",
+    "missing": "404",
+    "gone": "410",
+    "soft404": "200, объявление снято",
+}
+
+AD_PATH = re.compile(r"/d/obyavlenie/(?P<kind>[a-z0-9]+)-(?P<property>[a-z]+)-ID(?P<id>\d+)\.html$")
+
+
+def ad_url(kind: str, type_of_property: str, ad_id: int) -> str:
+    return f"http://{BENCH_HOST}/d/obyavlenie/{kind}-{type_of_property}-ID{ad_id}.html"
+
+
+class FakeServices:
+    """
+    Один aiohttp-сервер на всех адресах прокси. Запросы к OLX приходят в absolute-form
+    (GET http://olx.bench/... через HTTP-прокси), к /search и API курсов - напрямую.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 300.0,
+        latency_sigma: float = 0.6,
+        polygon_ms: float = 30.0,
+        rates_ms: float = 50.0,
+        uzs_rate: float = 12650.0,
+        filler_kb: int = 64,
+        archive=None,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.polygon_ms = polygon_ms
+        self.rates_ms = rates_ms
+        self.uzs_rate = uzs_rate
+        self.filler_kb = filler_kb
+        # Сохранённые страницы (HtmlArchive) вместо синтетических, по ID объявления
+        self.archive = archive
+        self._archived = {entry["id"]: entry for entry in archive.entries()} if archive else {}
+        self._hits: Counter[str] = Counter()
+        self.requests: Counter[str] = Counter()
+        self._runner: web.AppRunner | None = None
+
+    async def _delay(self, median_ms: float):
+        if median_ms > 0:
+            await asyncio.sleep(random.lognormvariate(math.log(median_ms / 1000), self.latency_sigma))
+
+    def _page(self, type_of_property: str, ad_id: str) -> str:
+        entry = self._archived.get(ad_id)
+        if entry is not None:
+            return self.archive.read(entry)
+        if type_of_property not in PROPERTIES:
+            type_of_property = None
+        return render_ad(int(ad_id), type_of_property, self.filler_kb)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if request.path == "/search" and request.method == "POST":
+            self.requests["polygon"] += 1
+            await self._delay(self.polygon_ms)
+            return web.json_response({"polygon_id": 1, "key": "bench"})
+
+        if request.path.startswith("/v6/latest/"):
+            self.requests["rates"] += 1
+            await self._delay(self.rates_ms)
+            return web.json_response({"result": "success", "rates": {"USD": 1, "UZS": self.uzs_rate}})
+
+        match = AD_PATH.search(request.path)
+        if match is None:
+            return web.Response(status=404, text="not found")
+
+        kind = match["kind"]
+        self.requests[kind] += 1
+        self._hits[request.path] += 1
+        first_hit = self._hits[request.path] == 1
+        await self._delay(self.latency_ms)
+
+        if kind == "missing":
+            return web.Response(status=404, text="not found")
+        if kind == "gone":
+            return web.Response(status=410, text="gone")
+        if kind == "soft404":
+            return web.Response(text=render_not_found(), content_type="text/html")
+        if first_hit and kind == "forbidden":
+            return web.Response(status=403, text="forbidden")
+        if first_hit and kind == "challenge":
+            return web.Response(text=render_challenge(), content_type="text/html")
+        if first_hit and kind == "flaky":
+            return web.Response(status=502, text="bad gateway")
+
+        return web.Response(text=self._page(match["property"], match["id"]), content_type="text/html")
+
+    async def start(self, hosts: list[str], port: int = 0) -> int:
+        """Слушает на всех hosts на одном порту (127.0.0.x - адреса "прокси"), возвращает порт"""
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        first = web.TCPSite(self._runner, hosts[0], port)
+        await first.start()
+        port = self._runner.addresses[0][1]
+        for host in hosts[1:]:
+            await web.TCPSite(self._runner, host, port).start()
+        return port
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -5,6 +5,8 @@ PROXIES_PER_CONTAINER = 10  # сколько прокси на 1 контейн
 PROXY_PORT = 3000
 PROXY_LOGIN = "mSx81Xtb"
 PROXY_PASSWORD = "HUmetwMO"
+# Каталог на именованном томе: спул и состояние прокси переживают пересоздание контейнера
+DATA_DIR = "/data"
 
 # === Читаем прокси из файла ===
 with open("proxies.txt") as f:
@@ -18,11 +20,13 @@ if not proxies:
 chunks = [proxies[i : i + PROXIES_PER_CONTAINER] for i in range(0, len(proxies), PROXIES_PER_CONTAINER)]
 
 # === Базовая структура compose ===
-compose = {"version": "3.8", "services": {}}
+compose = {"version": "3.8", "services": {}, "volumes": {}}
 
 # === Генерируем сервисы ===
 for i, chunk in enumerate(chunks, start=1):
     service_name = f"parser_{i}"
+    # Свой том на каждый контейнер: у каждого воркера свой спул и свои прокси
+    volume_name = f"{service_name}_data"
     compose["services"][service_name] = {
         "build": {"context": ".", "dockerfile": "Dockerfile"},
         "container_name": service_name,
@@ -31,9 +35,13 @@ for i, chunk in enumerate(chunks, start=1):
             "PROXY_PORT": PROXY_PORT,
             "PROXY_LOGIN": PROXY_LOGIN,
             "PROXY_PASSWORD": PROXY_PASSWORD,
+            "PROXY_STATE_PATH": f"{DATA_DIR}/proxy_state.json",
+            "SPOOL_DIR": f"{DATA_DIR}/spool",
         },
+        "volumes": [f"{volume_name}:{DATA_DIR}"],
         "restart": "unless-stopped",
     }
+    compose["volumes"][volume_name] = {}
 
 # === Записываем результат ===
 with open("docker-compose.generated.yml", "w") as f:
@@ -0,0 +1,14 @@
+import os
+
+# Конфигурация читается при импорте модулей приложения; тестам не нужны ни сеть, ни MySQL
+for name, value in (
+    ("DB_URL", "sqlite+aiosqlite:///:memory:"),
+    ("PROXIES_IP", "127.0.0.1"),
+    ("PROXY_LOGIN", ""),
+    ("PROXY_PASSWORD", ""),
+    ("PROXY_PORT", "0"),
+    ("RABBITMQ_HOST", "test"),
+    ("RABBITMQ_USERNAME", "test"),
+    ("RABBITMQ_PASSWORD", "test"),
+):
+    os.environ.setdefault(name, value)
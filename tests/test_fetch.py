@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.misc import fetch
+from app.misc.latency import LatencyTracker
+
+AD_PAGE = '<html><nav data-testid="breadcrumbs"></nav>' + "x" * 4096 + "</html>"
+CHALLENGE_PAGE = "<html><title>Just a moment...</title><script>cf_chl_opt={}</script></html>"
+
+PRIMARY = "10.0.0.1"
+HEDGE = "10.0.0.2"
+
+
+class Proxy:
+    """Пул из одного запасного прокси, запоминающий ошибки"""
+
+    def __init__(self):
+        self.failures: list[str] = []
+
+    def get(self) -> str:
+        return HEDGE
+
+    def report_failure(self, proxy_ip: str):
+        self.failures.append(proxy_ip)
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    """Включает дублирование: задержка пула 0.05с, бюджета хватает на один дубль"""
+    tracker = LatencyTracker(min_samples=1)
+    tracker.record("fetch", 0.05)
+    monkeypatch.setattr(fetch, "latency", tracker)
+    monkeypatch.setattr(fetch.config.parser, "hedge_enabled", True)
+    monkeypatch.setattr(fetch.config.parser, "hedge_percentile", 0.5)
+    monkeypatch.setattr(fetch.config.parser, "timeout_min", 1.0)
+    monkeypatch.setattr(fetch.hedge_budget, "tokens", fetch.hedge_budget.burst)
+
+
+def use_responses(monkeypatch, responses: dict[str, tuple[float, int, str]]):
+    """Подменяет запрос: прокси -> (задержка, статус, тело)"""
+
+    async def fake_fetch(url, proxy_ip, headers, timeout, definitive=fetch.is_definitive):
+        delay, status_code, response_text = responses[proxy_ip]
+        await asyncio.sleep(delay)
+        return status_code, response_text
+
+    monkeypatch.setattr(fetch, "fetch_with_cloudscraper", fake_fetch)
+
+
+def test_challenge_from_hedge_does_not_cancel_primary(monkeypatch, hedging):
+    use_responses(monkeypatch, {PRIMARY: (0.3, 200, AD_PAGE), HEDGE: (0.0, 200, CHALLENGE_PAGE)})
+    proxy = Proxy()
+
+    status_code, response_text, proxy_ip = asyncio.run(fetch.fetch_hedged("https://olx.uz/ad", PRIMARY, {}, proxy))
+
+    assert (status_code, proxy_ip) == (200, PRIMARY)
+    assert response_text == AD_PAGE
+    # Challenge дублирующего прокси не теряется: он учитывается как ошибка этого прокси
+    assert proxy.failures == [HEDGE]
+
+
+def test_first_definitive_response_wins(monkeypatch, hedging):
+    use_responses(monkeypatch, {PRIMARY: (0.3, 200, AD_PAGE), HEDGE: (0.0, 404, "")})
+
+    status_code, _, proxy_ip = asyncio.run(fetch.fetch_hedged("https://olx.uz/ad", PRIMARY, {}, Proxy()))
+
+    assert (status_code, proxy_ip) == (404, HEDGE)
+
+
+def test_non_definitive_page_is_returned_when_nothing_better_arrives(monkeypatch, hedging):
+    use_responses(monkeypatch, {PRIMARY: (0.3, 403, ""), HEDGE: (0.0, 200, CHALLENGE_PAGE)})
+
+    status_code, _, proxy_ip = asyncio.run(fetch.fetch_hedged("https://olx.uz/ad", PRIMARY, {}, Proxy()))
+
+    assert (status_code, proxy_ip) == (200, HEDGE)
+
+
+def test_is_definitive():
+    assert fetch.is_definitive(200, AD_PAGE)
+    assert fetch.is_definitive(410, "")
+    assert not fetch.is_definitive(200, CHALLENGE_PAGE)
+    assert not fetch.is_definitive(200, "<html></html>")
+    assert not fetch.is_definitive(403, AD_PAGE)
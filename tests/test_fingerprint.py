@@ -0,0 +1,39 @@
+from bs4 import BeautifulSoup
+
+from app.misc.fingerprint import content_fingerprint
+
+TITLE = "Юнусабадский район, квартиры"
+DESCRIPTION = "Светлая квартира рядом с метро"
+
+
+def page(script: str, views: int, published: str, similar_price: str, price: str = "293 000 у.е.") -> BeautifulSoup:
+    """Страница объявления; всё, кроме price, отличается между загрузками неизменного объявления"""
+    html = f"""<html><head><script>window.__PRERENDERED_STATE__ = "{script}";</script></head><body>
+<div data-testid="ad-price-container"><h3>{price}</h3></div>
+<div data-testid="ad-parameters-container"><p>Частное лицо</p><p>Количество комнат: 4</p>
+<p>Общая площадь:\xa064 м²</p><p>Этаж: 7</p></div>
+<span data-testid="ad-posted-at">Опубликовано: {published}</span>
+<span data-testid="page-view-counter">Просмотров: {views}</span>
+<div data-testid="similar-ads"><p>Похожее объявление: 1</p><h3>{similar_price}</h3></div>
+</body></html>"""
+    return BeautifulSoup(html, "lxml")
+
+
+def test_volatile_markup_does_not_change_fingerprint():
+    first = page("a1b2c3", views=10, published="Сегодня в 10:15", similar_price="150 000 у.е.")
+    second = page("d4e5f6", views=57, published="вчера", similar_price="999 000 сум")
+
+    assert content_fingerprint(first, TITLE, DESCRIPTION) == content_fingerprint(second, TITLE, DESCRIPTION)
+
+
+def test_price_change_changes_fingerprint():
+    first = page("a1b2c3", views=10, published="вчера", similar_price="150 000 у.е.")
+    second = page("a1b2c3", views=10, published="вчера", similar_price="150 000 у.е.", price="280 000 у.е.")
+
+    assert content_fingerprint(first, TITLE, DESCRIPTION) != content_fingerprint(second, TITLE, DESCRIPTION)
+
+
+def test_page_without_containers_has_no_fingerprint():
+    soup = BeautifulSoup("<html><body><h3>293 000 у.е.</h3><p>Этаж: 7</p></body></html>", "lxml")
+
+    assert content_fingerprint(soup, TITLE, DESCRIPTION) is None
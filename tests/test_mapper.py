@@ -0,0 +1,66 @@
+import asyncio
+
+from sqlalchemy import func, insert, select
+
+from app.models.db_helper import db_helper
+from app.models.organization import Organization, Platform
+from app.persistence.mapper import organization_id
+from app.schemas.records import ApartmentRecord
+
+SELLER = "https://www.olx.uz/list/user/u000002/"
+
+
+class LateSession:
+    """
+    Сессия, первый SELECT которой не видит организацию: другой обработчик
+    вставил её между проверкой и вставкой этого обработчика
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.stale_reads = 1
+
+    async def scalar(self, statement):
+        if self.stale_reads:
+            self.stale_reads -= 1
+            return None
+        return await self.session.scalar(statement)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+def record() -> ApartmentRecord:
+    return ApartmentRecord(
+        type_of_property="apartment",
+        type_of_service="sale",
+        url="https://www.olx.uz/d/obyavlenie/race-ID800000002.html",
+        title="Квартира",
+        description="Описание",
+        external_id="800000002",
+        organization_url=SELLER,
+        total_price=50_000,
+    )
+
+
+def test_concurrent_organization_insert_returns_existing_row():
+    async def scenario():
+        await db_helper.create_all()
+        session = db_helper.get_scope_session()
+        try:
+            result = await session.execute(insert(Organization).values(url=SELLER, platform=Platform.OLX))
+            existing = result.inserted_primary_key[0]
+            await session.commit()
+
+            found = await organization_id(LateSession(session), record())
+            await session.commit()
+            count = await session.scalar(select(func.count()).select_from(Organization))
+        finally:
+            await session.remove()
+            await db_helper.engine.dispose()
+        return existing, found, count
+
+    existing, found, count = asyncio.run(scenario())
+
+    assert found == existing
+    assert count == 1
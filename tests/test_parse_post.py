@@ -0,0 +1,25 @@
+import asyncio
+import time
+
+from app.parse.parse_post import BaseParser
+
+
+class SlowServiceParser(BaseParser):
+    """Этап, который почти всё время ждёт внешний сервис"""
+
+    async def __extract_price(self):
+        time.sleep(0.01)
+        with self.waiting("currency"):
+            await asyncio.sleep(0.2)
+
+    async def run(self):
+        await self.__extract_price()
+
+
+def test_waiting_is_excluded_from_stage_timings():
+    parser = SlowServiceParser("https://www.olx.uz/d/obyavlenie/x.html", None, None, html="")
+
+    asyncio.run(parser.run())
+
+    assert parser.waits["currency"] >= 0.2
+    assert 0.01 <= parser.timings["extract_price"] < 0.1
@@ -0,0 +1,61 @@
+import asyncio
+
+from sqlalchemy import exc
+
+from app.models.post_price_history import Currency
+from app.persistence import price_history as price_history_module
+from app.persistence.price_history import PriceHistoryWriter
+
+
+class Session:
+    """Сессия, которая запоминает вставленные строки или падает на execute, пока failing"""
+
+    def __init__(self, failing: bool):
+        self.failing = failing
+        self.inserted: list[dict] = []
+
+    async def execute(self, statement, rows):
+        if self.failing:
+            raise exc.OperationalError("INSERT", {}, ConnectionError("server has gone away"))
+        self.inserted.extend(rows)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def remove(self):
+        pass
+
+
+def use_session(monkeypatch, session: Session):
+    monkeypatch.setattr(price_history_module.db_helper, "get_scope_session", lambda: session)
+
+
+def test_failed_flush_keeps_rows_for_next_attempt(monkeypatch):
+    writer = PriceHistoryWriter(batch=10, interval=1)
+    session = Session(failing=True)
+    use_session(monkeypatch, session)
+
+    writer.record("post-1", 100, Currency.USD)
+    writer.record("post-2", 200, Currency.UZS)
+    assert asyncio.run(writer.flush()) is False
+    # Пока БД недоступна, появляются новые наблюдения: они идут после возвращённых
+    writer.record("post-3", 300, None)
+
+    session.failing = False
+    assert asyncio.run(writer.flush()) is True
+    assert [row["post_id"] for row in session.inserted] == ["post-1", "post-2", "post-3"]
+    assert writer._rows == []
+
+
+def test_failed_flush_drops_oldest_rows_over_limit(monkeypatch):
+    writer = PriceHistoryWriter(batch=10, interval=1, limit=3)
+    use_session(monkeypatch, Session(failing=True))
+
+    for number in range(5):
+        writer.record(f"post-{number}", 100 + number, Currency.USD)
+    asyncio.run(writer.flush())
+
+    assert [row["post_id"] for row in writer._rows] == ["post-2", "post-3", "post-4"]
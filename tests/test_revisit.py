@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app import revisit
+from app.models.db_helper import db_helper
+from app.models.post import Post
+from app.models.post_sale_house import PostSaleHouse
+from app.persistence.mapper import write
+from app.schemas.message import PostMessage
+from app.schemas.records import HouseRecord
+
+
+def house(number: int, total_price: int) -> HouseRecord:
+    return HouseRecord(
+        type_of_property="house",
+        type_of_service="sale",
+        url=f"https://www.olx.uz/d/obyavlenie/house-ID80000010{number}.html",
+        title="Дом",
+        description="Описание",
+        external_id=f"80000010{number}",
+        organization_url="https://www.olx.uz/list/user/u000003/",
+        total_price=total_price,
+        total_area_sqm=100,
+        price_per_square=total_price / 100,
+    )
+
+
+async def save(*records: HouseRecord) -> list[str]:
+    session = db_helper.get_scope_session()
+    try:
+        post_ids = [(await write(session, record))[0] for record in records]
+        await session.commit()
+    finally:
+        await session.remove()
+    return post_ids
+
+
+async def stamps() -> dict[str, object]:
+    async with db_helper.session_factory() as session:
+        return dict((await session.execute(select(Post.id, Post.revisit_enqueued_at))).all())
+
+
+class Publisher:
+    """Подтверждает все сообщения, кроме сообщений для постов из rejected; запоминает отметки в момент публикации"""
+
+    def __init__(self, rejected: set[str]):
+        self.rejected = rejected
+        self.stamped_at_publish: dict[str, bool] = {}
+
+    async def publish(self, message, routing_key: str) -> asyncio.Task:
+        post_id = PostMessage.decode(message.body).post_id
+        self.stamped_at_publish[post_id] = (await stamps())[post_id] is not None
+
+        async def confirm() -> bool:
+            return post_id not in self.rejected
+
+        return asyncio.create_task(confirm())
+
+
+def test_revisit_stamps_before_publishing_and_clears_unconfirmed(monkeypatch):
+    monkeypatch.setattr(revisit.config.revisit, "rate", 1000.0)
+
+    async def scenario():
+        await db_helper.create_all()
+        try:
+            confirmed_id, rejected_id = await save(house(1, 100_000), house(2, 200_000))
+            session = db_helper.get_scope_session()
+            try:
+                await session.execute(update(Post).values(updated_at=datetime(2020, 1, 1)))
+                await session.commit()
+            finally:
+                await session.remove()
+
+            publisher = Publisher(rejected={rejected_id})
+            published = await revisit.revisit(publisher)
+            return confirmed_id, rejected_id, publisher, published, await stamps()
+        finally:
+            await db_helper.engine.dispose()
+
+    confirmed_id, rejected_id, publisher, published, after = asyncio.run(scenario())
+
+    assert publisher.stamped_at_publish == {confirmed_id: True, rejected_id: True}
+    assert published == 1
+    assert after[confirmed_id] is not None
+    # Брокер не подтвердил публикацию: пост снова доступен следующему проходу
+    assert after[rejected_id] is None
+
+
+def test_refresh_updates_price_per_square_with_price():
+    async def scenario():
+        await db_helper.create_all()
+        try:
+            (post_id,) = await save(house(3, 100_000))
+            await save(house(3, 120_000))
+            async with db_helper.session_factory() as session:
+                return await session.scalar(
+                    select(PostSaleHouse.price_per_square).where(PostSaleHouse.post_id == post_id)
+                )
+        finally:
+            await db_helper.engine.dispose()
+
+    assert asyncio.run(scenario()) == 1200
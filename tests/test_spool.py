@@ -0,0 +1,194 @@
+import asyncio
+import json
+import time
+from dataclasses import replace
+from datetime import UTC
+
+from sqlalchemy import exc, select
+
+from app.models.db_helper import db_helper
+from app.models.post import Post, Status
+from app.models.post_price_history import Currency, PostPriceHistory
+from app.persistence.price_history import price_history
+from app.persistence import spool as spool_module
+from app.persistence.spool import REJECTED_FILE, Spool
+from app.schemas.records import ApartmentRecord
+
+
+def apartment(total_price: int) -> ApartmentRecord:
+    return ApartmentRecord(
+        type_of_property="apartment",
+        type_of_service="sale",
+        url="https://www.olx.uz/d/obyavlenie/spool-ID800000001.html",
+        title="Квартира",
+        description="Описание",
+        external_id="800000001",
+        organization_url="https://www.olx.uz/list/user/u000001/",
+        total_price=total_price,
+        currency=Currency.USD,
+        rooms=2,
+        total_floor=9,
+        total_area_sqm=54,
+    )
+
+
+async def replay(spool: Spool):
+    entries, _, _ = spool._read(*spool._load_position())
+    await spool._flush(entries)
+
+
+def test_replay_writes_price_history_with_parse_time(tmp_path):
+    async def scenario():
+        await db_helper.create_all()
+        spool = Spool(str(tmp_path))
+        try:
+            before = time.time()
+            await spool.save(apartment(100_000))
+            await spool.save(apartment(95_000))
+            after = time.time()
+            # БД была недоступна: записи выгружаются позже, уже после перезапуска воркера
+            await replay(Spool(str(tmp_path)))
+
+            session = db_helper.get_scope_session()
+            try:
+                rows = (
+                    await session.execute(
+                        select(PostPriceHistory.price_usd, PostPriceHistory.observed_at).order_by(
+                            PostPriceHistory.id
+                        )
+                    )
+                ).all()
+            finally:
+                await session.remove()
+        finally:
+            await db_helper.engine.dispose()
+        return rows, before, after
+
+    rows, before, after = asyncio.run(scenario())
+
+    assert [row.price_usd for row in rows] == [100_000, 95_000]
+    for row in rows:
+        assert before - 1 <= row.observed_at.replace(tzinfo=UTC).timestamp() <= after + 1
+    # История записей спула не проходит через буфер, который теряется при остановке воркера
+    assert price_history._rows == []
+
+
+def test_cancelled_append_does_not_cancel_the_group(tmp_path):
+    spool = Spool(str(tmp_path))
+
+    async def scenario():
+        first = asyncio.create_task(spool.set_status("post-a", Status.ACTIVE))
+        second = asyncio.create_task(spool.set_status("post-b", Status.ACTIVE))
+        # Оба вызова ждут один fsync; первый отменяется (например, при остановке воркера)
+        await asyncio.sleep(0)
+        first.cancel()
+        await second
+        writer = spool._writer
+        if writer is not None:
+            await writer
+        # Запись после отмены тоже проходит: фоновая запись не упала
+        await spool.set_status("post-c", Status.ACTIVE)
+        return first.cancelled()
+
+    assert asyncio.run(scenario()) is True
+    entries, _, _ = spool._read(*spool._load_position())
+    assert [entry["post_id"] for entry in entries] == ["post-a", "post-b", "post-c"]
+
+
+class DownSession:
+    """Сессия недоступной БД: любой запрос падает с OperationalError"""
+
+    def __init__(self):
+        self.attempts = 0
+
+    async def _fail(self, *args, **kwargs):
+        self.attempts += 1
+        raise exc.OperationalError("SELECT", {}, ConnectionError("server has gone away"))
+
+    execute = scalar = _fail
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def remove(self):
+        pass
+
+
+def test_outage_is_retried_without_advancing_position(tmp_path, monkeypatch):
+    spool = Spool(str(tmp_path), interval=0.01, retry_max=0.02)
+    down = DownSession()
+    monkeypatch.setattr(spool_module.db_helper, "get_scope_session", lambda: down)
+
+    async def scenario():
+        await spool.set_status("post-a", Status.REMOVED)
+        runner = asyncio.create_task(spool.run())
+        try:
+            await asyncio.sleep(0.2)
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert down.attempts >= 2
+    # Позиция не сдвинута, запись не отклонена: она выгрузится, когда БД вернётся
+    assert spool._load_position() == (1, 0)
+    assert not (tmp_path / REJECTED_FILE).exists()
+
+
+def test_rejected_entry_is_set_aside_and_batch_continues(tmp_path):
+    spool = Spool(str(tmp_path))
+
+    async def scenario():
+        await db_helper.create_all()
+        try:
+            # Заголовок NOT NULL: БД отклоняет только эту запись, остальные записываются
+            await spool.save(replace(apartment(100_000), external_id="800000002", title=None))
+            await spool.save(apartment(100_000))
+            await replay(spool)
+            session = db_helper.get_scope_session()
+            try:
+                return (await session.execute(select(Post.external_id))).scalars().all()
+            finally:
+                await session.remove()
+        finally:
+            await db_helper.engine.dispose()
+
+    saved = asyncio.run(scenario())
+
+    assert saved == ["800000001"]
+    rejected = [json.loads(line) for line in (tmp_path / REJECTED_FILE).read_text().splitlines()]
+    assert [entry["record"]["external_id"] for entry in rejected] == ["800000002"]
+    assert "error" in rejected[0]
+
+
+def test_segments_rotate_and_torn_line_is_skipped(tmp_path):
+    spool = Spool(str(tmp_path), segment_size=200, batch=100)
+
+    async def append(writer: Spool, *post_ids: str):
+        for post_id in post_ids:
+            await writer.set_status(post_id, Status.ACTIVE)
+
+    asyncio.run(append(spool, "post-1", "post-2", "post-3", "post-4"))
+    assert len(spool._segments()) > 1
+
+    # Аварийная остановка посреди записи: последняя строка оборвана
+    last = spool._segment_path(spool._segments()[-1])
+    spool._file.close()
+    with open(last, "ab") as f:
+        f.write(b'{"op": "status", "post_id": "tor')
+
+    # После перезапуска новая запись начинается с новой строки
+    restarted = Spool(str(tmp_path), segment_size=200, batch=100)
+    asyncio.run(append(restarted, "post-5"))
+
+    entries, segment, offset = restarted._read(*restarted._load_position())
+    assert [entry["post_id"] for entry in entries] == ["post-1", "post-2", "post-3", "post-4", "post-5"]
+
+    # Выгруженные сегменты удаляются при сохранении позиции
+    restarted._save_position(segment, offset)
+    assert restarted._segments() == [segment]
+    assert restarted._read(segment, offset)[0] == []